@@ -0,0 +1,256 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+from scanner import GeneratedScanner, RegexScanner, Scanner
+from cparser import GeneratedParser, Parser
+from cache import Cache, Entry, OUTPUTS, ENCODINGS
+from stats import Stats, compile_stats
+from util.buffer import AllBuffer
+from util.logger import BudgetExceeded, ErrorBudget
+from util.types_ import Interner, TokenType
+
+# engines that a source can be compiled with (their outputs are the same)
+SCANNERS = {'dfa': Scanner, 'regex': RegexScanner,
+            'generated': GeneratedScanner}
+PARSERS = {'table': Parser, 'generated': GeneratedParser}
+
+# interner of the files compiled by this worker process (see `init_worker`)
+_interner = None
+
+
+@dataclass
+class Result:
+    """Result of compiling a single source file
+
+    `error` is the exception message if the compilation failed.
+    """
+    source: str
+    output: str
+    tokens: int = 0
+    lexical_errors: int = 0
+    syntax_errors: int = 0
+    seconds: float = 0
+    error: str = None
+    cached: bool = False
+    stats: Stats = None
+
+
+def decode(data: bytes) -> str:
+    """decodes the source the same way as the file is read by the buffers"""
+    return io.TextIOWrapper(io.BytesIO(data)).read()
+
+
+def compile_text(text, max_errors=None, stop=False,
+                 interner: Interner = None, scanner_kind='dfa',
+                 parser_kind='table') -> Entry:
+    """Compiles the source text
+
+    Args:
+        max_errors (int, optional): error budget, only the first `max_errors`
+        lexical and syntax errors are logged (see `ErrorBudget`). Defaults to
+        no budget.
+        stop (bool, optional): stop compiling after the budget is spent
+        (instead of only counting further errors).
+        interner (Interner, optional): interner of the symbols, files of a
+        batch share the interner of their worker. Defaults to a new one.
+        scanner_kind (str, optional): scanner of the text (a key of
+        SCANNERS). Defaults to 'dfa'.
+        parser_kind (str, optional): parser of the tokens (a key of
+        PARSERS). Defaults to 'table'.
+
+    Returns:
+        Entry: contents of the output files and the counts.
+    """
+    budget = ErrorBudget(max_errors, stop) if max_errors is not None else None
+    scanner = SCANNERS[scanner_kind](AllBuffer(fake=text), interner=interner)
+    scanner.logger.budget = budget
+    err, tree = io.StringIO(), io.StringIO()
+    parser = PARSERS[parser_kind](scanner, err, tree, budget)
+    parser.parse()
+    # the scanner is drained to EOF (the first DOLOR, like
+    # `Scanner.tokenize`) unless the parser has already lexed it
+    lexed = parser.block and parser.block[-1][0] == TokenType.DOLOR
+    if not lexed and not (budget and budget.stopped):
+        try:
+            scanner.iterate_ignore()  # parser may stop before EOF
+        except BudgetExceeded:
+            pass
+    tok, lex, sym = io.StringIO(), io.StringIO(), io.StringIO()
+    scanner.dump_log(file_tokens=tok, file_errors=lex, file_symbols=sym)
+    outputs = {'tokens.txt': tok, 'lexical_errors.txt': lex,
+               'symbol_table.txt': sym, 'syntax_errors.txt': err,
+               'parse_tree.txt': tree}
+    return Entry(tuple(outputs[name].getvalue() for name in OUTPUTS),
+                 sum(map(len, scanner.logger.tokens.values())),
+                 sum(map(len, scanner.logger.errors.values()))
+                 + scanner.logger.dropped_errors,
+                 parser.error_count)
+
+
+def compile_file(source, output, cache: Cache = None, stats=False,
+                 max_errors=None, stop=False, scanner_kind='dfa',
+                 parser_kind='table', interner: Interner = None) -> Result:
+    """Compiles a source file and writes its outputs into `output` directory
+
+    Outputs are the same files that the compiler writes in the current
+    directory (parse_tree.txt, syntax_errors.txt, tokens.txt,
+    lexical_errors.txt and symbol_table.txt). If `cache` has the result of
+    the same source, scanning and parsing is skipped. If `stats` is True, the
+    source is compiled with `compile_stats` (without the cache, the error
+    budget and the engines) and its statistics are kept in the result.
+    `max_errors` and `stop` are the error budget, `scanner_kind` and
+    `parser_kind` are the engines (a cached result is used whichever engine
+    made it, as their outputs are the same) and `interner` is the interner of
+    the symbols (see `compile_text`).
+    """
+    result = Result(source, output)
+    start = time.perf_counter()
+    try:
+        with open(source, 'rb') as f:
+            data = f.read()
+        if stats:
+            entry, result.stats = compile_stats(decode(data), interner)
+        else:
+            options = (max_errors, stop) if max_errors is not None else ()
+            key = cache.key(data, *options) if cache else None
+            entry = cache.get(key) if cache else None
+            result.cached = entry is not None
+            if entry is None:
+                entry = compile_text(decode(data), max_errors, stop,
+                                     interner, scanner_kind, parser_kind)
+                if cache:
+                    cache.put(key, entry)
+        os.makedirs(output, exist_ok=True)
+        for name, content in zip(OUTPUTS, entry.outputs):
+            with open(os.path.join(output, name), 'w',
+                      encoding=ENCODINGS.get(name)) as f:
+                f.write(content)
+        result.tokens = entry.tokens
+        result.lexical_errors = entry.lexical_errors
+        result.syntax_errors = entry.syntax_errors
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def init_worker() -> None:
+    global _interner
+    _interner = Interner()
+
+
+def compile_in_worker(*args) -> Result:
+    """compiles a file in a worker process with the interner of the worker
+    (see `compile_file`)"""
+    return compile_file(*args, interner=_interner)
+
+
+def find_sources(paths, pattern="input.txt"):
+    """Finds source files and their output directory names
+
+    Files are used as they are and directories are searched recursively for
+    files matching `pattern`. Output name of a file found in a directory is
+    its path relative to the parent of that directory (without suffix) and the
+    name of other files is their stem. Duplicate names get a "-N" suffix.
+
+    Returns:
+        List[Tuple[str, str]]: (source, output name) pairs
+    """
+    sources = []
+    names = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            found = [(f, path.resolve().name /
+                      f.relative_to(path).with_suffix(''))
+                     for f in sorted(path.rglob(pattern)) if f.is_file()]
+        else:
+            found = [(path, Path(path.stem))]
+        for source, name in found:
+            unique, i = str(name), 1
+            while unique in names:
+                i += 1
+                unique = f"{name}-{i}"
+            names.add(unique)
+            sources.append((str(source), unique))
+    return sources
+
+
+def compile_batch(paths, output="out", jobs=None, pattern="input.txt",
+                  cache: Cache = None, stats=False, max_errors=None,
+                  stop=False, scanner_kind='dfa',
+                  parser_kind='table') -> List[Result]:
+    """Compiles many source files with a pool of processes
+
+    Args:
+        paths (List[str]): source files and/or directories (see find_sources).
+        output (str, optional): each file's outputs are written in its own
+        directory inside this directory. Defaults to "out".
+        jobs (int, optional): number of worker processes. Defaults to number
+        of CPUs. If it is 1, files are compiled in this process. Files that
+        are compiled in the same process share an interner.
+        pattern (str, optional): pattern of source files in directories.
+        cache (Cache, optional): cache of the results. It is evicted down to
+        its size after the batch.
+        stats (bool, optional): collect statistics of each file (see
+        `compile_file`).
+        max_errors (int, optional): error budget of each file (see
+        `compile_text`).
+        stop (bool, optional): stop compiling a file after its budget is
+        spent.
+        scanner_kind (str, optional): scanner of the files (see
+        `compile_text`).
+        parser_kind (str, optional): parser of the files (see
+        `compile_text`).
+
+    Returns:
+        List[Result]: results in the order of the sources
+    """
+    sources = find_sources(paths, pattern)
+    outputs = [os.path.join(output, name) for _, name in sources]
+    sources = [source for source, _ in sources]
+    options = [[option] * len(sources)
+               for option in (cache, stats, max_errors, stop, scanner_kind,
+                              parser_kind)]
+    if jobs == 1 or len(sources) <= 1:
+        options.append([Interner()] * len(sources))
+        results = list(map(compile_file, sources, outputs, *options))
+    else:
+        jobs = jobs or os.cpu_count()
+        chunksize = max(1, len(sources) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=init_worker) as executor:
+            results = list(executor.map(compile_in_worker, sources, outputs,
+                                        *options, chunksize=chunksize))
+    if cache:
+        cache.evict()
+    return results
+
+
+def summary(results: List[Result], seconds=None) -> str:
+    """Creates the aggregate summary of a batch"""
+    failed = [r for r in results if r.error]
+    lines = [f"{r.source}: {r.error}" for r in failed]
+    lines.append(
+        f"{len(results)} files compiled ({len(failed)} failed)"
+        + (f" in {seconds:.2f}s" if seconds is not None else "") + ": "
+        f"{sum(r.tokens for r in results)} tokens, "
+        f"{sum(r.lexical_errors for r in results)} lexical errors, "
+        f"{sum(r.syntax_errors for r in results)} syntax errors")
+    with_errors = sum(1 for r in results
+                      if r.lexical_errors or r.syntax_errors)
+    lines.append(f"{with_errors} files with errors")
+    cached = sum(1 for r in results if r.cached)
+    if cached:
+        lines.append(f"{cached} files from cache")
+    stats = [r.stats for r in results if r.stats]
+    if stats:
+        total = Stats()
+        for file_stats in stats:
+            total.merge(file_stats)
+        lines.append(total.report())
+    return "\n".join(lines)
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from cparser import Parser
+from scanner import Scanner
+from util.buffer import AllBuffer
+from util.logger import StreamLogger
+
+# inputs larger than this are not compiled with compiler.py (see `measure`)
+E2E_LIMIT = 200_000
+# direction of each metric: 1 if higher is better, -1 if lower is better
+METRICS = {'chars_per_second': 1, 'tokens_per_second': 1,
+           'nodes_per_second': 1, 'peak_memory': -1, 'latency': -1}
+
+
+class NullFile:
+    """file that discards what is written into it"""
+
+    def write(self, string):
+        return len(string)
+
+    def tell(self):
+        return 0
+
+
+class Generator:
+    """Generator of C-Minus sources for the benchmarks
+
+    Sources are random but deterministic (seeded) so runs are comparable.
+    """
+
+    def __init__(self, seed=0) -> None:
+        self.rng = random.Random(seed)
+        self.ids = [f"v{i}" for i in range(20)]
+
+    def factor(self, depth) -> str:
+        rng = self.rng
+        kind = rng.randrange(5) if depth < 3 else rng.randrange(2)
+        if kind == 0:
+            return rng.choice(self.ids)
+        if kind == 1:
+            return str(rng.randint(0, 999))
+        if kind == 2:
+            return f"({self.expression(depth + 1)})"
+        if kind == 3:
+            return f"{rng.choice(self.ids)}[{self.expression(depth + 1)}]"
+        return f"f{rng.randrange(10)}({self.expression(depth + 1)})"
+
+    def additive(self, depth) -> str:
+        rng = self.rng
+        terms = [" * ".join(self.factor(depth)
+                            for _ in range(rng.choice([1, 1, 2])))
+                 for _ in range(rng.choice([1, 1, 2, 3]))]
+        return "".join(term if i == 0 else f" {rng.choice('+-')} {term}"
+                       for i, term in enumerate(terms))
+
+    def expression(self, depth=0) -> str:
+        rng = self.rng
+        if rng.random() < 0.2:
+            return f"{rng.choice(self.ids)} = {self.expression(depth + 1)}"
+        if rng.random() < 0.3:
+            return (f"{self.additive(depth)} {rng.choice(['<', '=='])} "
+                    f"{self.additive(depth)}")
+        return self.additive(depth)
+
+    def statement(self, indent, depth=0) -> str:
+        rng, pad = self.rng, "    " * indent
+        kind = rng.randrange(6) if depth < 3 else 0
+        if kind <= 1:
+            return f"{pad}{self.expression()};\n"
+        if kind == 2:
+            return (f"{pad}if ({self.expression()})\n"
+                    + self.statement(indent + 1, depth + 1)
+                    + f"{pad}else\n" + self.statement(indent + 1, depth + 1))
+        if kind == 3:
+            return (f"{pad}repeat\n" + self.statement(indent + 1, depth + 1)
+                    + f"{pad}until ({self.expression()})\n")
+        if kind == 4:
+            return f"{pad}return {self.expression()};\n"
+        return (f"{pad}{{\n"
+                + "".join(self.statement(indent + 1, depth + 1)
+                          for _ in range(rng.randint(1, 4)))
+                + f"{pad}}}\n")
+
+    def function(self, i) -> str:
+        count = self.rng.randint(2, 8)
+        body = "".join(self.statement(1) for _ in range(count))
+        return (f"int f{i}(int a, int b[]) {{\n    int v{i % 20};\n"
+                f"{body}}}\n")
+
+    def program(self, size) -> str:
+        """valid program of about `size` characters"""
+        parts, length, i = ["int v0;\nint v1[10];\n"], 0, 0
+        while length < size:
+            parts.append(self.function(i))
+            length += len(parts[-1])
+            i += 1
+        parts.append("void main(void) {\n    f0(1);\n}\n")
+        return "".join(parts)
+
+    def nested(self, depth) -> str:
+        """deeply nested expressions and compound statements"""
+        return ("void main(void) {\n" + "{" * depth + "a = " + "(" * depth
+                + "1" + " + 1)" * depth + ";" + "}" * depth + "\n}\n")
+
+    def comments(self, size) -> str:
+        """program with a comment (and indentation) around each line"""
+        lines = []
+        for line in self.program(size // 3).splitlines():
+            lines.append(f"        /* {line.strip()} is a line ** of code */")
+            lines.append(f"{line}        ")
+        return "\n".join(lines) + "\n"
+
+    def errors(self, size) -> str:
+        """program with lexical and syntax errors"""
+        rng, out = self.rng, []
+        for line in self.program(size).splitlines():
+            r = rng.random()
+            if r < 0.1:
+                line += " @ 12ab"
+            elif r < 0.2:
+                line = line.replace(";", "", 1)
+            elif r < 0.25:
+                line += " */ /"
+            out.append(line)
+        return "\n".join(out) + "\n/* unclosed comment"
+
+
+def cases(scale=1.0):
+    """Benchmark inputs as {name: source}"""
+    generator = Generator()
+    size = int(100_000 * scale)
+    return {
+        'small': generator.program(size // 100),
+        'medium': generator.program(size),
+        'large': generator.program(size * 20),
+        'nested': generator.nested(max(10, int(500 * scale))),
+        'comments': generator.comments(size),
+        'errors': generator.errors(size),
+    }
+
+
+def best(function, repeat):
+    """returns (minimum seconds, result) of calling `function`"""
+    seconds, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - start)
+    return max(seconds, 1e-9), result
+
+
+def measure(text, repeat=3, e2e=True):
+    """Measures the scanner, parser and compiler on the source text
+
+    Parse tree is not rendered in the parser and memory measurements, because
+    the rendered tree grows quadratically with the nesting of the
+    declaration and statement lists (and it is written in chunks anyway).
+
+    Parser and memory are measured on the pipeline that compiler.py runs
+    (the Parser reads the tokens of the Scanner in blocks), so nodes/s
+    includes lexing the tokens.
+
+    Returns:
+        dict: chars/s and tokens/s of the scanner, nodes/s of the parser,
+        peak memory of scanning and parsing the text (bytes) and the
+        latency of running compiler.py on it (seconds, only for inputs up
+        to E2E_LIMIT characters).
+    """
+    def scan():
+        scanner = Scanner(AllBuffer(fake=text))
+        scanner.iterate_ignore()
+        return sum(map(len, scanner.logger.tokens.values()))
+    seconds, tokens = best(scan, repeat)
+    result = {'chars_per_second': len(text) / seconds,
+              'tokens_per_second': tokens / seconds}
+
+    def parse():
+        scanner = Scanner(AllBuffer(fake=text),
+                          logger=StreamLogger(NullFile(), NullFile()))
+        parser = Parser(scanner, NullFile(), NullFile())
+        start = time.perf_counter()
+        parser.step_lookahead()
+        tree = parser.transit_program()
+        return time.perf_counter() - start, len(tree)
+    seconds, nodes = min(parse() for _ in range(repeat))
+    result['nodes_per_second'] = nodes / max(seconds, 1e-9)
+
+    tracemalloc.start()
+    parse()
+    result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    if e2e and len(text) <= E2E_LIMIT:
+        compiler = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'compiler.py')
+        with tempfile.TemporaryDirectory() as path:
+            source = os.path.join(path, 'input.txt')
+            with open(source, 'w') as f:
+                f.write(text)
+            result['latency'], _ = best(lambda: subprocess.run(
+                [sys.executable, compiler, source, '-o', path, '-j', '1'],
+                check=True, stdout=subprocess.DEVNULL), repeat)
+    return result
+
+
+def run(scale=1.0, repeat=3, e2e=True, names=None):
+    """Runs the benchmarks
+
+    Returns:
+        dict: machine readable results (`results` maps each case to its
+        metrics, see `measure`).
+    """
+    results = {}
+    for name, text in cases(scale).items():
+        if names and name not in names:
+            continue
+        results[name] = measure(text, repeat, e2e)
+        results[name]['chars'] = len(text)
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'scale': scale, 'results': results}
+
+
+def compare(current, baseline, threshold=10.0):
+    """Compares results with the baseline
+
+    Args:
+        threshold (float, optional): allowed regression of each metric in
+        percent.
+
+    Returns:
+        List[str]: regressions (a metric of a case that is worse than the
+        baseline by more than `threshold` percent).
+
+    Raises:
+        ValueError: if the baseline is measured on a different scale.
+    """
+    if current['scale'] != baseline['scale']:
+        raise ValueError(f"baseline scale is {baseline['scale']} but "
+                         f"results scale is {current['scale']}")
+    regressions = []
+    for name, metrics in current['results'].items():
+        base = baseline['results'].get(name, {})
+        for metric, direction in METRICS.items():
+            if metric not in metrics or not base.get(metric):
+                continue
+            change = (metrics[metric] - base[metric]) / base[metric] * 100
+            if -direction * change > threshold:
+                regressions.append(
+                    f"{name}.{metric}: {base[metric]:.6g} -> "
+                    f"{metrics[metric]:.6g} ({change:+.1f}%)")
+    return regressions
+
+
+def report(results) -> str:
+    """formats the results as a table"""
+    lines = [f"{'case':10}{'chars':>10}{'chars/s':>12}{'tokens/s':>12}"
+             f"{'nodes/s':>12}{'peak MB':>10}{'latency':>10}"]
+    for name, m in results['results'].items():
+        lines.append(
+            f"{name:10}{m['chars']:>10}{m['chars_per_second']:>12.0f}"
+            f"{m['tokens_per_second']:>12.0f}{m['nodes_per_second']:>12.0f}"
+            f"{m['peak_memory'] / 2**20:>10.2f}"
+            + (f"{m['latency']:>10.3f}" if 'latency' in m else f"{'-':>10}"))
+    return "\n".join(lines)
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmarks of the C-Minus scanner, parser and compiler.")
+    arg_parser.add_argument('-o', '--output', default='bench.json',
+                            help="results file (default: bench.json)")
+    arg_parser.add_argument('-b', '--baseline', default=None,
+                            help="baseline results to compare with")
+    arg_parser.add_argument('-t', '--threshold', type=float, default=10.0,
+                            help="allowed regression in percent (default: 10)")
+    arg_parser.add_argument('-s', '--scale', type=float, default=1.0,
+                            help="scale of the input sizes (default: 1)")
+    arg_parser.add_argument('-r', '--repeat', type=int, default=3,
+                            help="repeats of each measurement (default: 3)")
+    arg_parser.add_argument('-c', '--case', action='append', default=None,
+                            help="run only this case (can be repeated)")
+    arg_parser.add_argument('--no-e2e', action='store_true',
+                            help="do not measure compiler.py latency")
+    return arg_parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(args.scale, args.repeat, not args.no_e2e, args.case)
+    print(report(results))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        sys.exit(1 if regressions else 0)
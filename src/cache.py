@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cparser
+import scanner
+from util import buffer, cminus, dfa, logger, tokens, tree, types_
+
+# names of the output files in the order they are stored in an entry
+OUTPUTS = ('tokens.txt', 'lexical_errors.txt', 'symbol_table.txt',
+           'syntax_errors.txt', 'parse_tree.txt')
+# encodings of the output files (others are written with the default one)
+ENCODINGS = {'parse_tree.txt': 'utf-8'}
+MAGIC = b'CMC1'
+
+
+@lru_cache(maxsize=1)
+def fingerprint() -> bytes:
+    """Fingerprint of the grammar and the compiler version
+
+    It is the hash of the GRAMMAR JSON and the sources of the modules that
+    define the lexer (CMinus tails and Dfa), the parser, the outputs and how
+    a file is compiled (`batch.compile_text`), so any change in them
+    invalidates the cached results.
+    """
+    digest = hashlib.sha256(MAGIC)
+    digest.update(json.dumps(cminus.GRAMMAR, sort_keys=True).encode())
+    paths = [Path(module.__file__) for module in (
+        buffer, cminus, dfa, logger, tokens, tree, types_, scanner, cparser)]
+    # batch imports this module, so it is found by its path
+    paths.append(Path(__file__).with_name('batch.py'))
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.digest()
+
+
+@dataclass
+class Entry:
+    """Cached result of compiling a source
+
+    outputs: contents of the output files (in the order of OUTPUTS).
+    """
+    outputs: Tuple[str, ...]
+    tokens: int = 0
+    lexical_errors: int = 0
+    syntax_errors: int = 0
+
+    HEADER = struct.Struct(f'<4s3I{len(OUTPUTS)}I')
+
+    def to_bytes(self) -> bytes:
+        """serializes the entry (a header of counts and lengths followed by
+        the utf-8 outputs, compressed with zlib)"""
+        data = [output.encode('utf-8') for output in self.outputs]
+        header = self.HEADER.pack(MAGIC, self.tokens, self.lexical_errors,
+                                  self.syntax_errors, *map(len, data))
+        return zlib.compress(header + b''.join(data))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Entry':
+        """deserializes an entry
+
+        Raises:
+            ValueError: if data is not a valid entry.
+        """
+        try:
+            data = zlib.decompress(data)
+            magic, *counts = cls.HEADER.unpack_from(data)
+        except (zlib.error, struct.error) as e:
+            raise ValueError(f"invalid cache entry: {e}")
+        if magic != MAGIC:
+            raise ValueError("invalid cache entry: bad magic")
+        outputs, offset = [], cls.HEADER.size
+        for length in counts[3:]:
+            outputs.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+        if offset != len(data):
+            raise ValueError("invalid cache entry: bad length")
+        return cls(tuple(outputs), *counts[:3])
+
+
+class Cache:
+    """Content addressed on-disk cache of compilation results
+
+    Entries are keyed by the hash of the source bytes and the `fingerprint`,
+    and each one is a file in `path` (in a sub-directory named by the first
+    two characters of the key). Entries are written to a temporary file and
+    renamed, so readers (even in other processes) never see a partial entry.
+
+    Modification time of an entry is updated when it is read, so `evict`
+    removes the least recently used entries when the cache is larger than
+    `max_size`. An entry that is removed or corrupted is a miss.
+    """
+    # seconds after which an orphan temporary file is removed
+    STALE_TEMP = 3600
+
+    def __init__(self, path, max_size=256 * 2**20) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+
+    def key(self, data: bytes, *options) -> str:
+        """returns key of the source bytes (compiled with the options, e.g. an
+        error budget)"""
+        digest = hashlib.sha256(fingerprint())
+        if options:
+            digest.update(repr(options).encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def file(self, key: str) -> Path:
+        return self.path / key[:2] / key
+
+    def get(self, key: str) -> Optional[Entry]:
+        """returns the entry of the key or None on a miss"""
+        file = self.file(key)
+        try:
+            data = file.read_bytes()
+            os.utime(file)
+            return Entry.from_bytes(data)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, entry: Entry) -> None:
+        """stores the entry (atomically replaces the old entry of the key)"""
+        file = self.file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=file.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(entry.to_bytes())
+            os.replace(temp, file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def evict(self) -> int:
+        """removes least recently used entries until the cache fits in
+        `max_size` (and orphan temporary files)
+
+        Returns:
+            int: number of removed entries
+        """
+        entries, size, now = [], 0, time.time()
+        for file in self.path.glob('*/*'):
+            try:
+                stat = file.stat()
+                if file.suffix == '.tmp':
+                    if now - stat.st_mtime > self.STALE_TEMP:
+                        file.unlink()
+                    continue
+            except FileNotFoundError:  # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+            size += stat.st_size
+        removed = 0
+        entries.sort()
+        for _, file_size, file in entries:
+            if size <= self.max_size:
+                break
+            try:
+                file.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        return removed
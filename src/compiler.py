@@ -1,10 +1,94 @@
+import argparse
 import os
+import time
+
+from batch import compile_batch, summary, PARSERS, SCANNERS
+from cache import Cache, OUTPUTS, ENCODINGS
+from stats import compile_stats
+from parallel import ParallelScanner, ParallelParser
+from util.logger import ErrorBudget
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        description="C-Minus compiler. Without sources, input.txt next to "
+        "this file is compiled into the current directory.")
+    arg_parser.add_argument('sources', nargs='*',
+                            help="source files or directories of sources")
+    arg_parser.add_argument('-o', '--output', default='out',
+                            help="directory of the outputs (default: out)")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="number of worker processes "
+                            "(default: number of CPUs)")
+    arg_parser.add_argument('-p', '--pattern', default='input.txt',
+                            help="pattern of the sources in directories "
+                            "(default: input.txt)")
+    arg_parser.add_argument('--cache', default=None, metavar='DIR',
+                            help="directory of the cache of the results of "
+                            "the sources (default: no cache)")
+    arg_parser.add_argument('--cache-size', type=int, default=256,
+                            metavar='MB', help="size limit of the cache in "
+                            "megabytes (default: 256)")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help="print phase timings and counters of the "
+                            "scanner and the parser")
+    arg_parser.add_argument('--max-errors', type=int, default=None,
+                            metavar='N', help="log only the first N lexical "
+                            "and syntax errors of each source, further errors "
+                            "are counted (not with --stats or --parallel)")
+    arg_parser.add_argument('--stop-on-max-errors', action='store_true',
+                            help="stop compiling a source after --max-errors "
+                            "errors")
+    arg_parser.add_argument('--parallel', action='store_true',
+                            help="lex input.txt in chunks and parse its "
+                            "declarations with --jobs worker processes (for a "
+                            "large input)")
+    arg_parser.add_argument('--scanner', choices=list(SCANNERS),
+                            default='dfa', help="scanner engine (default: "
+                            "dfa, not with --stats or --parallel)")
+    arg_parser.add_argument('--parser', choices=list(PARSERS),
+                            default='table', help="parser engine (default: "
+                            "table, not with --stats or --parallel)")
+    args = arg_parser.parse_args()
+    if args.cache and not args.sources:
+        arg_parser.error("--cache is only supported with sources")
+    engines = (args.scanner, args.parser) != ('dfa', 'table')
+    if engines and (args.stats or args.parallel):
+        arg_parser.error("--scanner and --parser are not supported with "
+                         "--stats or --parallel")
+    return args
 
-from scanner import Scanner
-from cparser import Parser
 
 if __name__ == "__main__":
-    INPUT_FILENAME = os.path.join(os.path.dirname(__file__), 'input.txt')
-    scanner = Scanner(file=INPUT_FILENAME)
-    parser = Parser(scanner)
-    parser.parse()
+    args = parse_args()
+    if not args.sources:
+        INPUT_FILENAME = os.path.join(os.path.dirname(__file__), 'input.txt')
+        if args.stats:
+            with open(INPUT_FILENAME) as f:
+                entry, stats = compile_stats(f.read())
+            for name, content in zip(OUTPUTS, entry.outputs):
+                if name in ('parse_tree.txt', 'syntax_errors.txt'):
+                    with open(name, 'w', encoding=ENCODINGS.get(name)) as f:
+                        f.write(content)
+            print(stats.report())
+        elif args.parallel:
+            with open(INPUT_FILENAME) as f:
+                scanner = ParallelScanner(f.read(), args.jobs)
+            parser = ParallelParser(jobs=args.jobs)
+            parser.parse(scanner.tokens)
+        else:
+            budget = ErrorBudget(args.max_errors, args.stop_on_max_errors) \
+                if args.max_errors is not None else None
+            scanner = SCANNERS[args.scanner](file=INPUT_FILENAME)
+            scanner.logger.budget = budget
+            parser = PARSERS[args.parser](scanner, budget=budget)
+            parser.parse()
+    else:
+        start = time.perf_counter()
+        cache = Cache(args.cache, args.cache_size * 2**20) \
+            if args.cache else None
+        results = compile_batch(args.sources, args.output, args.jobs,
+                                args.pattern, cache, args.stats,
+                                args.max_errors, args.stop_on_max_errors,
+                                args.scanner, args.parser)
+        print(summary(results, time.perf_counter() - start))
@@ -1,56 +1,182 @@
 from util.cminus import GRAMMAR
+from parsegen import get_generated_parser
 from scanner import Scanner
-from anytree import Node, RenderTree
+from util.logger import BudgetExceeded, ErrorBudget
+from util.tree import ParseTree
+from util.tokens import TokenStore
 from util.types_ import TokenType
 
 
 class Rule:
     def __init__(self, rule, prediction) -> None:
         self.rule = rule
-        self.prediction = prediction
+        self.prediction = frozenset(prediction)
 
 
 class Transition:
     def __init__(self, diagram) -> None:
-        self.first = diagram['first']
-        self.follow = diagram['follow']
+        self.first = frozenset(diagram['first'])
+        self.follow = frozenset(diagram['follow'])
         self.rules = [Rule(rule['rule'], rule['prediction'])
                       for rule in diagram['rules']]
+        self.predict = {terminal: rule for rule in reversed(self.rules)
+                        for terminal in rule.prediction}
 
     def get_rule(self, terminal):
-        for rule in self.rules:
-            if terminal in rule.prediction:
-                return rule
-        return None
+        return self.predict.get(terminal)
+
+
+class PredictTable:
+    """LL(1) Predict Table
+
+    Grammar compiled into integer indexed tables. Terminals and nonterminals
+    are mapped to small integers (their index in `terminals` and
+    `nonterminals`) and `predict[nonterminal][terminal]` is the id of the rule
+    that should be used (or NO_RULE). Terminals that are not in the grammar
+    (e.g. ':') are mapped to the extra UNKNOWN terminal.
+
+    Rules are compiled into tuples of edges. Each edge is (is_nonterminal, id).
+    Epsilon rules are empty tuples.
+
+    `sync[nonterminal][terminal]` is 1 if the terminal ends the panic mode of
+    the nonterminal (it predicts a rule, it is in the follow set or it is
+    EOF), so illegal tokens are skipped with a single lookup each.
+    """
+    NO_RULE = -1
+
+    def __init__(self, grammar) -> None:
+        transitions = {key: Transition(val) for key, val in grammar.items()}
+        self.nonterminals = list(transitions)
+        self.nonterminal_ids = {nt: i for i, nt
+                                in enumerate(self.nonterminals)}
+        self.terminals = []
+        self.terminal_ids = {}
+        # sets are walked in order, so ids do not depend on the hash seed
+        # (e.g. in the generated parser, see `parsegen`)
+        for trans in transitions.values():
+            for terminal in sorted(trans.follow):
+                self.terminal_id_of(terminal)
+            for rule in trans.rules:
+                for terminal in sorted(rule.prediction):
+                    self.terminal_id_of(terminal)
+                for edge in rule.rule:
+                    if edge and edge not in transitions:
+                        self.terminal_id_of(edge)
+        self.UNKNOWN = len(self.terminals)
+        self.DOLOR = self.terminal_ids[str(TokenType.DOLOR)]
+        self.type_ids = {tt: self.terminal_ids[str(tt)] for tt in
+                         [TokenType.ID, TokenType.NUM, TokenType.DOLOR]}
+
+        self.rules = []
+        self.predict = []
+        self.first = []
+        self.follow = []
+        self.sync = []
+        for trans in transitions.values():
+            row = [self.NO_RULE] * (self.UNKNOWN + 1)
+            for rule in reversed(trans.rules):
+                for terminal in rule.prediction:
+                    row[self.terminal_ids[terminal]] = len(self.rules)
+                self.rules.append(tuple(
+                    (True, self.nonterminal_ids[edge]) if edge in transitions
+                    else (False, self.terminal_ids[edge])
+                    for edge in rule.rule if edge))
+            self.predict.append(row)
+            self.first.append(frozenset(self.terminal_ids[t]
+                                        for t in trans.first if t))
+            self.follow.append(frozenset(self.terminal_ids[t]
+                                         for t in trans.follow))
+            self.sync.append(bytes(
+                rule != self.NO_RULE or terminal in self.follow[-1]
+                or terminal == self.DOLOR
+                for terminal, rule in enumerate(row)))
+
+    def terminal_id_of(self, terminal) -> int:
+        """returns id of the terminal (terminal will be added if it is new)"""
+        if terminal not in self.terminal_ids:
+            self.terminal_ids[terminal] = len(self.terminals)
+            self.terminals.append(terminal)
+        return self.terminal_ids[terminal]
+
+    def terminal_id(self, tt, lexim) -> int:
+        """maps a token to its terminal id"""
+        if tt == TokenType.SYMBOL or tt == TokenType.KEYWORD:
+            return self.terminal_ids.get(lexim, self.UNKNOWN)
+        return self.type_ids[tt]
+
+
+TABLE = PredictTable(GRAMMAR)
 
 
 class Parser:
     """Parser of CMinus
 
     This parser is using Transition Diagram Model.
+
+    NOTE: tokens are lexed (and logged by the scanner) ahead of the parse in
+    blocks, so if the parse stops before EOF the scanner's logger and symbol
+    table have some tokens that were not consumed. Front ends that write the
+    scanner outputs drain the scanner to EOF (the first DOLOR) after the
+    parse (see `batch.compile_text`), so the outputs are those of the whole
+    input, the same as `Scanner.tokenize`.
     """
 
-    def __init__(self, scanner: Scanner, err=None, tree=None) -> None:
+    def __init__(self, scanner: Scanner, err=None, tree=None,
+                 budget: ErrorBudget = None) -> None:
         self.scanner = scanner
-        self.grammar = {key: Transition(val) for key, val in GRAMMAR.items()}
+        self.table = TABLE
         self.unexpected_eof = False
+        self.error_count = 0
+        self.budget = budget
+        # block of tokens lexed ahead (see `Scanner.next_tokens`). Errors are
+        # logged in order with the syntax errors if there is a budget.
+        self.block, self.block_pos = [], 0
+        self.block_size = 1 if budget else Scanner.BLOCK
         self.syn_err = err if err else open('syntax_errors.txt', 'w')
         self.tree = tree if tree else open('parse_tree.txt', 'w', -1, "utf-8")
+        self.parse_tree = ParseTree()
+        self.labels = [self.parse_tree.intern(nt)
+                       for nt in self.table.nonterminals]
+        self.terminal_labels = {}
 
     def step_lookahead(self):
         """Updates the lookahead
 
-        Reads next token from the scanner and updates the lookahead token with
-        the token itself and extracts the terminal string from it so it can be
-        matched in with the rules in the grammar.
+        Reads next token from the block of the scanner tokens (the next block
+        is lexed when it is consumed) and updates the lookahead token with the
+        token itself and maps it to its terminal id so it can be matched with
+        the predict table.
         """
-        lookahead = self.scanner.get_next_token()
+        if self.block_pos == len(self.block):
+            self.block = self.scanner.next_tokens(self.block_size)
+            self.block_pos = 0
+        lookahead = self.block[self.block_pos]
+        self.block_pos += 1
         self.lookahead = lookahead
         tt, lexim, self.lineno = lookahead
+        self.tid = self.table.terminal_id(tt, lexim)
+
+    def peek(self, k=1):
+        """returns the k-th token after the lookahead (k-token lookahead)
+
+        Tokens are lexed ahead into the block, so they are not lexed again
+        when they are consumed. Tokens after EOF are DOLOR.
+        """
+        while self.block_pos + k > len(self.block):
+            if self.block and self.block[-1][0] == TokenType.DOLOR:
+                return self.block[-1]
+            self.block = self.block[self.block_pos:] + \
+                self.scanner.next_tokens(max(k, self.block_size))
+            self.block_pos = 0
+        return self.block[self.block_pos + k - 1]
+
+    @property
+    def terminal(self):
+        """terminal string of the lookahead (used in error messages)"""
+        tt, lexim, _ = self.lookahead
         if tt == TokenType.SYMBOL or tt == TokenType.KEYWORD:
-            self.terminal = lexim
-        else:
-            self.terminal = str(tt)
+            return lexim
+        return str(tt)
 
     def match(self, parent_node):
         """Accepts a terminal
@@ -58,72 +184,168 @@ class Parser:
         Accepts a terminal, add it to the parse tree and get the next token as
         the lookahead.
         """
-        tt, lexim, _ = self.lookahead
-        Node(f"({str(tt)}, {lexim})", parent_node)
+        token = self.lookahead[:2]
+        label = self.terminal_labels.get(token)
+        if label is None:
+            label = self.parse_tree.intern("({}, {})".format(*token))
+            self.terminal_labels[token] = label
+        self.parse_tree.add(label, parent_node)
         self.step_lookahead()
 
     def match_epsilon(self, parent_node):
         """Matches an epsilon rule
 
         Adds a epsilon in the tree without moving lookahead"""
-        Node('epsilon', parent_node)
+        self.parse_tree.add_epsilon(parent_node)
 
     def log_syntax_error(self, msg):
+        """logs a syntax error (it is only counted if the error budget is
+        spent, see `ErrorBudget`)"""
+        self.error_count += 1
+        if self.budget is not None and not self.budget.spend():
+            return
         self.syn_err.write(f"#{self.lineno} : syntax error, {msg}\n")
 
-    def transit(self, diagram='Program', parent_node=None):
+    def predict(self, nt):
+        """Selects the rule of nonterminal `nt` for the lookahead
+
+        If no rule can be found (i.e. lookahead is not in first set or follow)
+        panic mode is started and illegal tokens are discarded until a rule is
+        found or the lookahead is in the follow set.
+
+        Returns:
+            int: id of the rule or NO_RULE if nonterminal is missing.
+
+        Raises:
+            EOFError: if EOF is reached in the panic mode.
+        """
+        table = self.table
+        rule = table.predict[nt][self.tid]
+        if rule != table.NO_RULE:
+            return rule
+        # PANIC!
+        sync = table.sync[nt]
+        while not sync[self.tid]:
+            self.log_syntax_error("illegal " + self.terminal)
+            self.step_lookahead()
+        rule = table.predict[nt][self.tid]
+        if rule != table.NO_RULE:
+            return rule
+        if self.tid in table.follow[nt]:
+            self.log_syntax_error(f"missing " + table.nonterminals[nt])
+            return rule
+        self.log_syntax_error("Unexpected EOF")
+        raise EOFError()
+
+    def transit(self, diagram='Program', parent_node=ParseTree.NONE):
         """Executes the transition of `diagram`
 
         This function tries to match current lookahead token with current
-        diagram."""
-        trans = self.grammar[diagram]
-        rule = trans.get_rule(self.terminal)
-        # no rule can be found (i.e. not in first set or follow)
-        while not rule:
-            # PANIC!
-            if self.terminal in trans.follow:
-                self.log_syntax_error(f"missing " + diagram)
-                return
+        diagram. Instead of recursion, edges that should be matched are kept in
+        an explicit stack (i.e. a pushdown automaton), so the depth of the tree
+        is not bounded by the recursion limit. Edges of a rule are pushed in
+        reverse so they are visited in the same order as recursive descent.
+        """
+        table = self.table
+        stack = [(True, table.nonterminal_ids[diagram], parent_node)]
+        while stack:
+            is_nonterminal, edge, parent = stack.pop()
+            if not is_nonterminal:
+                if self.tid == edge:
+                    self.match(parent)
+                else:  # if does not match missing something
+                    self.log_syntax_error(f"missing " + table.terminals[edge])
+                continue
+            rule = self.predict(edge)
+            if rule == table.NO_RULE:
+                continue
+            node = self.parse_tree.add(self.labels[edge], parent)
+            edges = table.rules[rule]
+            if not edges:  # epsilon move
+                self.match_epsilon(node)
             else:
-                if self.terminal == 'DOLOR':
-                    self.log_syntax_error("Unexpected EOF")
-                    raise EOFError()
-                else:
-                    self.log_syntax_error("illegal " + self.terminal)
-                    self.step_lookahead()
-            rule = trans.get_rule(self.terminal)
-        node = Node(diagram, parent_node)
-        if not rule.rule[0]:  # epsilon move
-            self.match_epsilon(node)
-        else:
-            for i, edge in enumerate(rule.rule):
-                if edge in self.grammar:  # if edge is a production rule
-                    self.transit(edge, node)
-                else:  # if edge is a terminal
-                    if self.terminal == edge:
-                        self.match(node)
-                    else:  # if does not match missing something
-                        self.log_syntax_error(f"missing " + edge)
+                for is_nonterminal, child in reversed(edges):
+                    stack.append((is_nonterminal, child, node))
 
     def transit_program(self):
         """Program is constructed with "Program $"
 
         This rule is not in the set of rules but we can simulate this rule by
-        adding a $ matching at the end of the transit"""
-        root = Node('root')
+        adding a $ matching at the end of the transit. Parse is stopped at
+        an unexpected EOF or when the error budget is exceeded (in its stop
+        mode)."""
+        tree = self.parse_tree
         try:
-            self.transit(parent_node=root)
-            Node('$', root.children[0])
-        except:
+            self.transit()
+            tree.add(tree.intern('$'), tree.root)
+        except (EOFError, BudgetExceeded):
             pass
-        return root.children[0]
+        return tree
 
     def parse(self):
-        """Generates Parse Tree and Syntax Errors"""
-        self.step_lookahead()
-        tree = self.transit_program()
-        lines = [f"{pre}{node.name}" for pre, _, node in RenderTree(tree)]
-        self.tree.write("\n".join(lines))
-        if not self.syn_err.tell():
+        """Generates Parse Tree and Syntax Errors
+
+        Returns:
+            ParseTree: parse tree of the program (see `ParseTree.to_anytree`
+            for an anytree view of it).
+        """
+        try:
+            self.step_lookahead()
+        except BudgetExceeded:  # a lexical error of the first token spent it
+            tree = self.parse_tree
+        else:
+            tree = self.transit_program()
+        tree.write(self.tree)
+        if not self.syn_err.tell() and not self.error_count and \
+                not (self.budget and self.budget.stopped):
             self.syn_err.write('There is no syntax error.')
         return tree
+
+
+class GeneratedParser(Parser):
+    """Parser of the generated parser module
+
+    Each nonterminal is a specialized function of the module generated from
+    the grammar (see `parsegen`), so the predict table is not looked up and
+    rules are not iterated while parsing. The functions push the edges of the
+    rules on the explicit stack like `Parser.transit`, so the outputs (and
+    the unbounded depth) are the same.
+    """
+
+    def __init__(self, scanner: Scanner, err=None, tree=None,
+                 budget: ErrorBudget = None) -> None:
+        super().__init__(scanner, err, tree, budget)
+        self.module = get_generated_parser(self.table)
+        self.stack = []
+
+    def transit(self, diagram='Program', parent_node=ParseTree.NONE):
+        self.stack = []
+        functions = self.module.make(self)
+        pop = self.stack.pop
+        functions[self.table.nonterminal_ids[diagram]](parent_node)
+        while self.stack:
+            function, parent = pop()
+            function(parent)
+
+
+class StoreParser(Parser):
+    """Parser of a TokenStore
+
+    The lookahead is read from the columns of the store (see
+    `Scanner.tokenize`), so terminal ids are not computed while parsing and
+    lexims are only materialized for the matched tokens and error messages.
+    """
+
+    def __init__(self, tokens: TokenStore, err=None, tree=None) -> None:
+        super().__init__(None, err, tree)
+        self.tokens = tokens
+        self.pos = -1
+
+    def step_lookahead(self):
+        self.pos += 1
+        self.tid = self.tokens.tids[self.pos]
+        self.lineno = self.tokens.lines[self.pos]
+
+    @property
+    def lookahead(self):
+        return self.tokens[self.pos]
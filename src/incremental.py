@@ -0,0 +1,478 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from typing import List, Tuple
+
+from scanner import Scanner
+from cparser import Parser
+from util.buffer import AllBuffer
+from util.logger import BudgetExceeded, Logger
+from util.tree import ParseTree
+from util.types_ import TokenType, ErrorType, SymbolTable, Symbol
+
+
+@dataclass
+class Checkpoint:
+    """Restart point of the scanner at the beginning of a line
+
+    offset: offset of the beginning of the line
+    lineno: line number that the buffer has at `offset`
+    index: index of the token that starts at `offset` (or contains it)
+    in_comment: the line starts inside a (multi-line) comment, so scanning can
+    not be restarted from it.
+    """
+    offset: int
+    lineno: int
+    index: int
+    in_comment: bool = False
+
+
+class Chunk:
+    """Run of the token stream of an IncrementalScanner
+
+    Starts and line numbers of the tokens are relative to the first token of
+    the chunk (`offset` and `lineno`), so an edit before the chunk only moves
+    these two. Log and IDs of the chunk are computed once when they are first
+    read (see `IncrementalScanner.logger` and `symbol_table`).
+    """
+    __slots__ = ('offset', 'lineno', 'types', 'lexims', 'starts', 'lines',
+                 '_log', '_ids')
+
+    def __init__(self, types, lexims, linenos, starts) -> None:
+        self.offset, self.lineno = starts[0], linenos[0]
+        self.types, self.lexims = types, lexims
+        self.starts = [start - self.offset for start in starts]
+        self.lines = [lineno - self.lineno for lineno in linenos]
+        self._log = self._ids = None
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def columns(self, first=0, delta=0, line_delta=0):
+        """types, lexims, line numbers and starts of the tokens from `first`
+        (moved by `delta` characters and `line_delta` lines)"""
+        offset, lineno = self.offset + delta, self.lineno + line_delta
+        return (self.types[first:], self.lexims[first:],
+                [lineno + line for line in self.lines[first:]],
+                [offset + start for start in self.starts[first:]])
+
+    def log(self) -> Logger:
+        """logs of the chunk (line numbers are relative)"""
+        if self._log is None:
+            self._log = Logger()
+            ignored = (TokenType.COMMENT, TokenType.WHITESPACE)
+            for tt, lexim, line in zip(self.types, self.lexims, self.lines):
+                if type(tt) is ErrorType:
+                    self._log.add_error(line, lexim, tt)
+                elif tt not in ignored:
+                    self._log.add_token(line, lexim, tt)
+        return self._log
+
+    def ids(self) -> List[str]:
+        """IDs of the chunk in the order of their first occurrence"""
+        if self._ids is None:
+            self._ids = list(dict.fromkeys(
+                lexim for tt, lexim in zip(self.types, self.lexims)
+                if tt == TokenType.ID))
+        return self._ids
+
+
+class IncrementalScanner(Scanner):
+    """Incremental Scanner
+
+    This scanner keeps the whole token stream (including whitespace, comments
+    and errors) in `Chunk`s. After an edit, scanning is restarted from the
+    beginning of the line of the first damaged token (a token that starts a
+    line is a safe restart point, i.e. it is not in a comment) over a window
+    of the text and is stopped as soon as a token starts at the same place
+    (after the edit) as a token of the old stream. Only the chunks of the
+    rescanned tokens are rebuilt, later chunks are reused (moved).
+
+    Logger and symbol table are merged from the logs and IDs of the chunks
+    when they are read (no input is scanned for that), so an edit does not
+    depend on the size of the text.
+    """
+    CHUNK = 256  # tokens of a rebuilt chunk
+    WINDOW = 1 << 12  # text after the edit that is scanned at first
+
+    def __init__(self, text="", dfa=None) -> None:
+        super().__init__(buffer=AllBuffer(fake=""), dfa=dfa)
+        self.interner = self.symbol_table.interner
+        self.text = text
+        self.chunks: List[Chunk] = []
+        self.rescanned = self.touched = 0
+        self.edit(0, 0, "")
+
+    @property
+    def logger(self) -> Logger:
+        if self._logger is None:
+            self._logger = Logger()
+            for chunk in self.chunks:
+                self._logger.merge(chunk.log(), chunk.lineno)
+        return self._logger
+
+    @logger.setter
+    def logger(self, logger: Logger) -> None:
+        self._logger = logger
+
+    @property
+    def symbol_table(self) -> SymbolTable:
+        if self._symbol_table is None:
+            self._symbol_table = SymbolTable(self.interner)
+            for chunk in self.chunks:
+                for lexim in chunk.ids():
+                    self._symbol_table.install(lexim)
+        return self._symbol_table
+
+    @symbol_table.setter
+    def symbol_table(self, symbol_table: SymbolTable) -> None:
+        self._symbol_table = symbol_table
+
+    def install_id(self, lexim) -> Tuple[TokenType, Symbol]:
+        """classifies the lexim (IDs are installed when the symbol table is
+        read, see `symbol_table`)"""
+        symbol = self.interner.intern(lexim)
+        if self.interner.is_keyword(symbol):
+            return TokenType.KEYWORD, symbol
+        return TokenType.ID, symbol
+
+    def locate(self, offset):
+        """returns (chunk, index) of the last token that starts at or before
+        `offset` (or the first token)"""
+        c = max(0, bisect_right([chunk.offset for chunk in self.chunks],
+                                offset) - 1)
+        chunk = self.chunks[c]
+        return c, max(0, bisect_right(chunk.starts, offset - chunk.offset) - 1)
+
+    def old_tokens(self, c, i):
+        """Generates (chunk, index, start, lineno) of the tokens from the
+        token `i` of chunk `c`"""
+        for c in range(c, len(self.chunks)):
+            chunk = self.chunks[c]
+            for i in range(i, len(chunk)):
+                yield (c, i, chunk.offset + chunk.starts[i],
+                       chunk.lineno + chunk.lines[i])
+            i = 0
+
+    def scan(self, offset, lineno, edit_end, delta, old):
+        """Scans from `offset` until the stream is synchronized with the old
+        one or EOF
+
+        Text is scanned in a window after the edit, which is enlarged if
+        the tokens reach its end.
+
+        Args:
+            offset (int): offset of the restart point.
+            lineno (int): line number at the restart point.
+            edit_end (int): end of the edited text (new offsets).
+            delta (int): change of the length of the text.
+            old (Tuple[int, int]): (chunk, index) of the first old token that
+            starts at or after the edited text.
+
+        Returns:
+            Tuple[list, Tuple[int, int], int]: new tokens (as columns),
+            (chunk, index) of the first reused old token (None if nothing is
+            reused) and the change of line numbers.
+        """
+        size = edit_end - offset + self.WINDOW
+        while True:
+            end = min(len(self.text), offset + size)
+            result = self.scan_window(offset, lineno, end, edit_end, delta,
+                                      self.old_tokens(*old))
+            if result is not None:
+                return result
+            size *= 4
+
+    def scan_window(self, offset, lineno, end, edit_end, delta, old):
+        """scans text[offset:end] (see `scan`), returns None if a token
+        reached the end of the window before the stream is synchronized"""
+        self.buf = buf = AllBuffer(fake=self.text[offset:end])
+        buf.lineno = lineno
+        limit = len(buf.file) if end < len(self.text) else None
+        new = ([], [], [], [])
+        old_token = next(old, None)
+        while True:
+            pos, lineno = buf.forward, buf.lineno
+            tt, lexim = self.get_token()
+            for column, value in zip(new, (tt, lexim, lineno, offset + pos)):
+                column.append(value)
+            pos = buf.forward
+            if pos == limit:  # it might be a part of a longer token
+                return None
+            if tt == TokenType.DOLOR:
+                return new, None, 0
+            pos += offset
+            if pos >= edit_end:
+                while old_token is not None and old_token[2] < pos - delta:
+                    old_token = next(old, None)
+                if old_token is not None and old_token[2] == pos - delta:
+                    return new, old_token[:2], buf.lineno - old_token[3]
+
+    def edit(self, start, end, text):
+        """Replaces text[start:end] with `text` and updates the token stream
+
+        Args:
+            start (int): offset of the beginning of the replaced text.
+            end (int): offset of the end of the replaced text.
+            text (str): new text.
+        """
+        delta = len(text) - (end - start)
+        self.text = self.text[:start] + text + self.text[end:]
+        self._logger = self._symbol_table = None
+        chunks = self.chunks
+        if not chunks:
+            new, _, _ = self.scan(0, 1, len(self.text), delta, (0, 0))
+            self.rescanned = self.touched = len(new[0])
+            self.chunks = self.split(new)
+            return
+        # first token that might have read a character of the edited range
+        # and the last token before it that starts a line
+        c, i = self.locate(start - 1)
+        while c or i:
+            previous = chunks[c - 1] if not i else chunks[c]
+            lexim = previous.lexims[i - 1 if i else -1]
+            if str(lexim).endswith('\n'):
+                break
+            c, i = (c, i - 1) if i else (c - 1, len(previous) - 1)
+        restart = chunks[c]
+        old = self.locate(end - 1) if end > start else (c, i)
+        new, reused, line_delta = self.scan(
+            restart.offset + restart.starts[i],
+            restart.lineno + restart.lines[i], start + len(text), delta, old)
+        self.rescanned = len(new[0])
+
+        # the chunks of the rescanned tokens are rebuilt
+        head = restart.columns()
+        columns = [h[:i] + n for h, n in zip(head, new)]
+        last = len(chunks) - 1
+        if reused is not None:
+            last, k = reused
+            tail = chunks[last].columns(k, delta, line_delta)
+            columns = [column + t for column, t in zip(columns, tail)]
+        self.touched = len(columns[0])
+        for chunk in chunks[last + 1:]:
+            chunk.offset += delta
+            chunk.lineno += line_delta
+        chunks[c:last + 1] = self.split(columns)
+
+    def split(self, columns) -> List[Chunk]:
+        """splits the columns of tokens into chunks"""
+        size = self.CHUNK
+        return [Chunk(*(column[j:j + size] for column in columns))
+                for j in range(0, len(columns[0]), size)]
+
+    def column(self, name):
+        """a column of the whole stream (e.g. for checks)"""
+        return [value for chunk in self.chunks
+                for value in chunk.columns()[name]]
+
+    @property
+    def types(self):
+        return self.column(0)
+
+    @property
+    def lexims(self):
+        return self.column(1)
+
+    @property
+    def linenos(self):
+        return self.column(2)
+
+    @property
+    def starts(self):
+        return self.column(3)
+
+    @property
+    def checkpoints(self) -> List[Checkpoint]:
+        """restart points of the lines (a line that starts inside a token is
+        in that token)"""
+        lexims, linenos, starts = self.lexims, self.linenos, self.starts
+        checkpoints = [Checkpoint(0, 1, 0)]
+        for index, lexim in enumerate(lexims):
+            if not isinstance(lexim, str) or '\n' not in lexim:
+                continue
+            start, lineno = starts[index], linenos[index]
+            i = lexim.find('\n')
+            while i != -1:
+                lineno += 1
+                if i + 1 == len(lexim):
+                    checkpoints.append(Checkpoint(
+                        start + i + 1, linenos[index + 1], index + 1))
+                else:
+                    checkpoints.append(Checkpoint(
+                        start + i + 1, lineno, index, True))
+                i = lexim.find('\n', i + 1)
+        return checkpoints
+
+    def tokens(self):
+        """returns valuable tokens as (type, lexim, lineno) like
+        `get_next_token` (ending with DOLOR)"""
+        ignored = (TokenType.COMMENT, TokenType.WHITESPACE)
+        return [(tt, lexim, chunk.lineno + line) for chunk in self.chunks
+                for tt, lexim, line in zip(chunk.types, chunk.lexims,
+                                           chunk.lines)
+                if type(tt) is TokenType and tt not in ignored]
+
+
+@dataclass
+class Declaration:
+    """Parse of a top level declaration
+
+    key: tokens of the declaration and the lookahead after it as (type, lexim,
+    line) where line is relative to the first token.
+    tree: subtree of the declaration (its root is the Declaration node).
+    errors: syntax errors as (relative line, message).
+    eof: parsing stopped with unexpected EOF in the declaration.
+    tokens: the same tokens with their absolute lines where the declaration
+    was last parsed or reused (so it is found again without its key).
+    """
+    key: Tuple
+    tree: ParseTree
+    errors: List[Tuple[int, str]]
+    eof: bool = False
+    tokens: List = None
+
+
+class IncrementalParser(Parser):
+    """Incremental Parser
+
+    This parser parses a list of tokens (e.g. `IncrementalScanner.tokens()`)
+    and keeps the parse of each top level Declaration. In the next parses, a
+    declaration whose tokens, relative line numbers and the lookahead after it
+    did not change is not parsed again, its subtree and errors are reused.
+    These are a function of those tokens only (LL(1) parser does not see
+    anything else), so outputs are the same as a full parse.
+
+    The top level "Program -> Declaration-list" and "Declaration-list ->
+    Declaration Declaration-list | epsilon" chain is walked by the parser
+    itself and other nonterminals are parsed by `transit`.
+    """
+    HEAD = 3
+
+    def __init__(self, err=None, tree=None) -> None:
+        super().__init__(None, err, tree)
+        self.cache = {}
+        self.reused = 0
+        ids = self.table.nonterminal_ids
+        self.program = ids['Program']
+        self.declaration_list = ids['Declaration-list']
+
+    def step_lookahead(self):
+        self.pos += 1
+        tt, lexim, self.lineno = self.lookahead = self.tokens[self.pos]
+        self.tid = self.table.terminal_id(tt, lexim)
+
+    def log_syntax_error(self, msg):
+        self.error_count += 1
+        self.errors.append((self.lineno, msg))
+
+    @staticmethod
+    def relative(tokens) -> Tuple:
+        """the tokens with lines relative to the first one"""
+        base = tokens[0][2]
+        return tuple((tt, lexim, lineno - base)
+                     for tt, lexim, lineno in tokens)
+
+    def key(self, start, length):
+        """tokens[start:start+length] with lines relative to the first one"""
+        return self.relative(self.tokens[start:start + length])
+
+    def lookup(self):
+        """finds a reusable parse of the declaration at the lookahead
+
+        A declaration that did not move is found by comparing the tokens with
+        its cached `tokens`, its key is only built if the lines moved.
+        """
+        for declaration in self.cache.get(self.key(self.pos, self.HEAD), []):
+            tokens = self.tokens[self.pos:self.pos + len(declaration.key)]
+            if tokens == declaration.tokens or \
+                    self.relative(tokens) == declaration.key:
+                declaration.tokens = tokens
+                return declaration
+        return None
+
+    def parse_declaration(self):
+        """parses the Declaration at the lookahead into its own tree"""
+        start, base = self.pos, self.lineno
+        tree, errors = self.parse_tree, self.errors
+        self.parse_tree, self.errors = ParseTree(tree), []
+        eof = False
+        try:
+            self.transit('Declaration')
+        except EOFError:
+            eof = True
+        tokens = self.tokens[start:self.pos + 1]
+        declaration = Declaration(
+            self.relative(tokens), self.parse_tree,
+            [(lineno - base, msg) for lineno, msg in self.errors], eof, tokens)
+        self.parse_tree, self.errors = tree, errors
+        return declaration
+
+    def transit_declaration(self, parent):
+        """Executes the transition of a top level Declaration
+
+        Parse of the declaration is reused if it is possible."""
+        base = self.lineno
+        declaration = self.lookup()
+        if declaration:
+            self.reused += 1
+            self.pos += len(declaration.key) - 2
+            self.step_lookahead()
+        else:
+            declaration = self.parse_declaration()
+        self.declarations.append(declaration)
+        self.parse_tree.graft(declaration.tree, parent)
+        for lineno, msg in declaration.errors:
+            self.errors.append((lineno + base, msg))
+        self.error_count += len(declaration.errors)
+        if declaration.eof:
+            raise EOFError()
+
+    def transit_program(self):
+        tree = self.parse_tree
+        table = self.table
+        try:
+            if self.predict(self.program) == table.NO_RULE:
+                return tree
+            parent = tree.add(self.labels[self.program])
+            while True:
+                rule = self.predict(self.declaration_list)
+                if rule == table.NO_RULE:
+                    break
+                parent = tree.add(self.labels[self.declaration_list], parent)
+                if not table.rules[rule]:  # epsilon move
+                    self.match_epsilon(parent)
+                    break
+                self.transit_declaration(parent)
+            tree.add(tree.intern('$'), tree.root)
+        except (EOFError, BudgetExceeded):
+            pass
+        return tree
+
+    def parse(self, tokens, err=None, tree=None):
+        """Generates Parse Tree and Syntax Errors of the tokens
+
+        Args:
+            tokens (List[Tuple[TokenType, str, int]]): valuable tokens (i.e.
+            `get_next_token` outputs) ending with DOLOR.
+            err (file, optional): syntax errors file of this parse.
+            tree (file, optional): parse tree file of this parse.
+        """
+        self.syn_err = err if err else self.syn_err
+        self.tree = tree if tree else self.tree
+        self.tokens, self.pos = tokens, -1
+        self.parse_tree = ParseTree(self.parse_tree)
+        self.errors, self.declarations = [], []
+        self.error_count = self.reused = 0
+        self.step_lookahead()
+        parse_tree = self.transit_program()
+        self.cache = {}
+        for declaration in self.declarations:
+            self.cache.setdefault(declaration.key[:self.HEAD], []) \
+                .append(declaration)
+        parse_tree.write(self.tree)
+        for lineno, msg in self.errors:
+            self.syn_err.write(f"#{lineno} : syntax error, {msg}\n")
+        if not self.errors:
+            self.syn_err.write('There is no syntax error.')
+        return parse_tree
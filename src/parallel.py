@@ -0,0 +1,286 @@
+import io
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from incremental import Chunk, Declaration, IncrementalParser
+from scanner import Scanner
+from util.buffer import AllBuffer
+from util.tree import ParseTree
+from util.types_ import TokenType, ErrorType, W
+
+# a comment (or an unclosed comment until EOF) for the boundary pre-pass
+COMMENT = re.compile(r"/\*(?:.*?\*/|.*)", re.DOTALL)
+
+# scanner and parser of the worker process (see `init_worker` and
+# `init_parser`)
+_scanner = None
+_parser = None
+
+
+def init_worker(text):
+    global _scanner
+    _scanner = Scanner(AllBuffer(fake=text))
+
+
+def init_parser(tokens):
+    global _parser
+    _parser = IncrementalParser(io.StringIO(), io.StringIO())
+    _parser.tokens = tokens
+
+
+def lex_chunk(start: int, end: int, scanner: Scanner = None) -> Tuple:
+    """Lexes the text from `start` until the first token that starts at or
+    after `end`
+
+    `start` is assumed to be the beginning of a token (the result is checked
+    when chunks are stitched, see `ParallelScanner`). Line numbers are
+    computed from the offsets, so they are the same as a sequential scan.
+
+    Returns:
+        Tuple[list, list, list, list, int]: types, lexims (as str), line
+        numbers and starts of the tokens (whitespace is skipped) and offset of
+        the first token after the chunk.
+    """
+    scanner = scanner if scanner else _scanner
+    buf = scanner.buf
+    buf.beginning = buf.forward = start
+    types, lexims, linenos, starts = [], [], [], []
+    while True:
+        buf.skip_while(W)
+        pos = buf.forward
+        if pos >= end:
+            return types, lexims, linenos, starts, pos
+        lineno = buf.lineno
+        tt, lexim = scanner.get_token()
+        types.append(tt)
+        lexims.append(lexim)
+        linenos.append(lineno)
+        starts.append(pos)
+        if tt == TokenType.DOLOR:  # nothing is after it
+            return types, lexims, linenos, starts, pos + 1
+
+
+def scan_chunk(start: int, end: int, scanner: Scanner = None) -> Tuple:
+    """Lexes a chunk of the text (see `lex_chunk`) and computes its log and
+    IDs, so they are merged as a whole when chunks are stitched
+
+    Returns:
+        Tuple[Chunk, int]: the chunk (None if there is no token in it) and
+        offset of the first token after the chunk.
+    """
+    types, lexims, linenos, starts, stop = lex_chunk(start, end, scanner)
+    if not types:
+        return None, stop
+    chunk = Chunk(types, lexims, linenos, starts)
+    chunk.log()
+    chunk.ids()
+    return chunk, stop
+
+
+def boundaries(text: str, chunks: int) -> List[int]:
+    """Finds boundaries that split the text into about `chunks` chunks
+
+    Each boundary is at a newline that is not in a comment (found by a quick
+    regex pass), so it is very likely to be between tokens.
+    """
+    comments = [(m.start(), m.end()) for m in COMMENT.finditer(text)]
+    ends = [end for _, end in comments]
+    points = [0]
+    for k in range(1, chunks):
+        point = text.find('\n', max(points[-1] + 1, len(text) * k // chunks))
+        i = bisect_right(ends, point)
+        if i < len(comments) and comments[i][0] < point:
+            point = text.find('\n', comments[i][1])
+        if point == -1:
+            break
+        points.append(point)
+    points.append(len(text) + 1)
+    return points
+
+
+class ParallelScanner(Scanner):
+    """Parallel Scanner
+
+    This scanner splits the text into chunks at `boundaries` and lexes each
+    chunk in a worker process (see `scan_chunk`). Chunks are stitched in
+    order: the tokens of a chunk are used from the token that starts where
+    the previous chunk stopped (i.e. the stream is synchronized). If no token
+    of the chunk starts there (e.g. a boundary was in a token), the chunk is
+    lexed again in this process from that offset.
+
+    Workers return the log and the IDs of each chunk with its tokens, so
+    stitching merges the logs line by line and installs the distinct IDs of
+    each chunk in order. The logger and the symbol table are the same as a
+    sequential `Scanner.iterate_ignore`. With a single job (or chunk) the
+    text is scanned by a plain Scanner in this process. Valuable tokens are
+    kept in `tokens` and returned by `get_next_token` (e.g. for the parser).
+    """
+    MIN_CHUNK = 1 << 16
+
+    def __init__(self, text, jobs=None, min_chunk=MIN_CHUNK) -> None:
+        super().__init__(buffer=AllBuffer(fake=text))
+        jobs = jobs or os.cpu_count()
+        chunks = min(jobs * 4, len(text) // min_chunk)
+        points = boundaries(text, chunks) if chunks > 1 else [0, len(text) + 1]
+        if jobs == 1 or len(points) <= 2:
+            self.scan()
+        else:
+            with ProcessPoolExecutor(jobs, initializer=init_worker,
+                                     initargs=(text,)) as executor:
+                results = list(executor.map(scan_chunk, points[:-1],
+                                            points[1:]))
+            self.stitch(results, points)
+        self.index = 0
+
+    def scan(self):
+        """scans the text sequentially (like `Scanner.iterate_ignore`)"""
+        self.tokens = []
+        while not self.tokens or self.tokens[-1][0] != TokenType.DOLOR:
+            self.tokens += Scanner.next_tokens(self, self.BLOCK)
+
+    def stitch(self, results, points):
+        """merges the chunks in order (see ParallelScanner)"""
+        self.tokens = []
+        local = None
+        pos, size = 0, len(self.buf.file)
+        ignored = (TokenType.COMMENT, TokenType.WHITESPACE)
+        for (chunk, stop), end in zip(results, points[1:]):
+            if pos >= stop and end <= size:  # chunk is in the previous token
+                continue
+            first = bisect_left(chunk.starts, pos - chunk.offset) \
+                if chunk else 0
+            if not chunk or first == len(chunk) or \
+                    chunk.starts[first] != pos - chunk.offset:
+                if local is None:
+                    local = Scanner(AllBuffer(fake=self.buf.file))
+                chunk, stop = scan_chunk(pos, end, local)
+            elif first:  # its first tokens are in the previous chunk
+                chunk = Chunk(*chunk.columns(first))
+            if chunk:
+                self.logger.merge(chunk.log(), chunk.lineno)
+                for lexim in chunk.ids():
+                    self.symbol_table.install(lexim)
+                self.tokens += [
+                    (tt, lexim, chunk.lineno + line) for tt, lexim, line
+                    in zip(chunk.types, chunk.lexims, chunk.lines)
+                    if tt not in ignored and type(tt) is not ErrorType]
+                if chunk.types[-1] == TokenType.DOLOR:
+                    break  # the rest is not scanned (e.g. after EOF character)
+            pos = stop
+        self.buf.beginning = self.buf.forward = size
+
+    def get_next_token(self):
+        token = self.tokens[min(self.index, len(self.tokens) - 1)]
+        self.index += 1
+        return token
+
+    def next_tokens(self, n):
+        tokens = self.tokens[self.index:self.index + n] or self.tokens[-1:]
+        self.index += n
+        return tokens
+
+
+def declaration_starts(tokens) -> List[int]:
+    """Finds the tokens that are likely to start a top level declaration
+
+    These are `int` and `void` keywords at brace depth 0 that are the first
+    token or come right after a ';' or '}'.
+    """
+    starts, depth, previous = [], 0, ';'
+    for i, (tt, lexim, _) in enumerate(tokens):
+        if tt == TokenType.SYMBOL:
+            if lexim == '{':
+                depth += 1
+            elif lexim == '}':
+                depth = max(0, depth - 1)
+        elif tt == TokenType.KEYWORD and depth == 0 and \
+                lexim in ('int', 'void') and previous in (';', '}'):
+            starts.append(i)
+        previous = lexim if tt == TokenType.SYMBOL else ''
+    return starts
+
+
+def parse_declarations(starts, parser: IncrementalParser = None) \
+        -> List[Declaration]:
+    """Parses a Declaration from each start (index of a token)
+
+    Subtrees of the declarations share the labels of one tree. Their cached
+    `tokens` are not returned (they are the key with absolute lines).
+    """
+    parser = parser if parser else _parser
+    parser.parse_tree, parser.errors = ParseTree(parser.parse_tree), []
+    tree, errors = parser.parse_tree, parser.errors
+    declarations = []
+    for start in starts:
+        parser.pos = start - 1
+        parser.step_lookahead()
+        try:
+            declarations.append(parser.parse_declaration())
+            declarations[-1].tokens = None
+        except (EOFError, IndexError):  # it is parsed again if it is used
+            parser.parse_tree, parser.errors = tree, errors
+    return declarations
+
+
+class ParallelParser(IncrementalParser):
+    """Parallel Parser
+
+    This parser finds the `declaration_starts` in the tokens and parses the
+    declaration at each start in a worker process. If `jobs` is 1 or there
+    are too few declarations for more than one chunk, it is a plain
+    IncrementalParser. The parses are put in the cache of the
+    IncrementalParser, so while the top level Declaration-list is walked (in
+    order), a parse is reused iff the declaration starts with the same
+    tokens, i.e. the parse is the same as a sequential one. Declarations
+    that are not found (e.g. after a syntax error that a start did not
+    expect) are parsed in this process.
+
+    Subtrees are grafted and syntax errors are merged in order like the
+    IncrementalParser, so outputs are the same as `Parser.parse`.
+    """
+    MIN_DECLARATIONS = 64
+
+    def __init__(self, err=None, tree=None, jobs=None,
+                 min_declarations=MIN_DECLARATIONS) -> None:
+        super().__init__(err, tree)
+        self.jobs = jobs or os.cpu_count()
+        self.min_declarations = min_declarations
+
+    def adopt(self, declarations: List[Declaration]) -> None:
+        """relabels the subtrees with the labels of this parser's tree (so
+        they are grafted without mapping) and caches the declarations"""
+        mappings = {}
+        like = self.parse_tree
+        for declaration in declarations:
+            tree = declaration.tree
+            mapping = mappings.get(id(tree.labels))
+            if mapping is None:
+                mapping = mappings[id(tree.labels)] = array(
+                    'i', [like.intern(label) for label in tree.labels])
+            tree.label = array('i', [mapping[label] for label in tree.label])
+            tree.labels, tree.label_ids = like.labels, like.label_ids
+            self.cache.setdefault(declaration.key[:self.HEAD], []) \
+                .append(declaration)
+
+    def parse(self, tokens, err=None, tree=None):
+        """Generates Parse Tree and Syntax Errors of the tokens (see
+        `IncrementalParser.parse`)"""
+        starts = declaration_starts(tokens)
+        self.cache = {}
+        # in this process a pre-parse would only parse everything twice
+        chunks = min(self.jobs * 4, len(starts) // self.min_declarations) \
+            if self.jobs > 1 else 1
+        if chunks <= 1:
+            return super().parse(tokens, err, tree)
+        size = -(-len(starts) // chunks)
+        parts = [starts[i:i + size] for i in range(0, len(starts), size)]
+        if len(parts) > 1:
+            with ProcessPoolExecutor(self.jobs, initializer=init_parser,
+                                     initargs=(tokens,)) as executor:
+                for declarations in executor.map(parse_declarations, parts):
+                    self.adopt(declarations)
+        return super().parse(tokens, err, tree)
@@ -0,0 +1,185 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from util import cminus
+from util.scangen import HEADER, load_module, write_atomic
+
+# generated module (it is rebuilt if its fingerprint is not `fingerprint()`)
+MODULE = Path(__file__).with_name('cminus_parser.py')
+
+
+@lru_cache(maxsize=None)
+def fingerprint(table) -> str:
+    """hash of the sources that the generated module is made of (the
+    grammar, the predict table and this generator) and of the ids of the
+    table's terminals and nonterminals"""
+    digest = hashlib.sha256()
+    for path in (Path(cminus.__file__), Path(__file__).with_name('cparser.py'),
+                 Path(__file__)):
+        digest.update(path.read_bytes())
+    digest.update(repr((table.terminals, table.nonterminals)).encode())
+    return digest.hexdigest()
+
+
+class Generator:
+    """Generator of the parser module of a PredictTable
+
+    Each nonterminal is generated as a function (`_n<id>`) that dispatches
+    the lookahead to its rules with inlined `if`s, adds the node with its
+    label and pushes the edges of the rule on the stack of the parser (so
+    the depth of the tree is still not bounded by the recursion limit).
+    Leading terminals of a rule are matched in place and its panic mode
+    (skipping illegal tokens, missing nonterminal or unexpected EOF) is
+    generated with the sync and follow sets of the nonterminal.
+
+    Each terminal edge is a function (`_t<id>`) that matches the terminal or
+    logs it as missing. All functions are closures of `make(parser)`, so the
+    methods and labels of the parser are bound once per transit.
+    """
+
+    def __init__(self, table) -> None:
+        self.table = table
+
+    @staticmethod
+    def test(tids) -> str:
+        """condition of the lookahead being one of the terminal ids"""
+        tids = sorted(tids)
+        if len(tids) == 1:
+            return f"tid == {tids[0]}"
+        return f"tid in {{{', '.join(map(str, tids))}}}"
+
+    def rule(self, rule: int, predicted, indent: str) -> List[str]:
+        """code of a predicted rule (the node is added by the caller)"""
+        table = self.table
+        edges = table.rules[rule]
+        if not edges:
+            return [f"{indent}add_epsilon(node)"]
+        lines = []
+        i = 0
+        # the predicted terminal is matched, then the other leading ones
+        if not edges[0][0] and predicted == {edges[0][1]}:
+            lines.append(f"{indent}match(node)")
+            i = 1
+        while i < len(edges) and not edges[i][0]:
+            lines += [f"{indent}if p.tid == {edges[i][1]}:",
+                      f"{indent}    match(node)",
+                      f"{indent}else:",
+                      f"{indent}    error({self.missing(edges[i])!r})"]
+            i += 1
+        for is_nonterminal, edge in reversed(edges[i:]):
+            name = f"_n{edge}" if is_nonterminal else f"_t{edge}"
+            lines.append(f"{indent}push(({name}, node))")
+        return lines
+
+    def missing(self, edge) -> str:
+        is_nonterminal, edge = edge
+        names = self.table.nonterminals if is_nonterminal \
+            else self.table.terminals
+        return "missing " + names[edge]
+
+    def nonterminal(self, nt: int) -> List[str]:
+        table = self.table
+        rules = {}
+        for terminal, rule in enumerate(table.predict[nt]):
+            if rule != table.NO_RULE:
+                rules.setdefault(rule, set()).add(terminal)
+        lines = [f"    def _n{nt}(parent):",
+                 f"        # {table.nonterminals[nt]}",
+                 "        while True:",
+                 "            tid = p.tid"]
+        for rule, predicted in sorted(rules.items()):
+            lines += [f"            if {self.test(predicted)}:",
+                      f"                node = add(label{nt}, parent)"]
+            lines += self.rule(rule, predicted, " " * 16)
+            lines.append("                return")
+        # PANIC! (the lookahead ends it iff it is in the follow set or EOF)
+        lines += [f"            if SYNC{nt}[tid]:",
+                  "                break",
+                  "            error(\"illegal \" + p.terminal)",
+                  "            step()"]
+        follow = table.follow[nt].difference(*rules.values())
+        if follow:
+            lines += [f"        if {self.test(follow)}:",
+                      f"            error({self.missing((True, nt))!r})",
+                      "            return"]
+        lines += ["        error(\"Unexpected EOF\")",
+                  "        raise EOFError()"]
+        return lines
+
+    def terminal(self, tid: int) -> List[str]:
+        return [f"    def _t{tid}(parent):",
+                f"        # {self.table.terminals[tid]}",
+                f"        if p.tid == {tid}:",
+                "            match(parent)",
+                "        else:",
+                f"            error({self.missing((False, tid))!r})"]
+
+    def generate(self) -> str:
+        """returns source of the module"""
+        table = self.table
+        nonterminals = range(len(table.nonterminals))
+        terminals = sorted({edge for rule in table.rules
+                            for is_nonterminal, edge in rule
+                            if not is_nonterminal})
+        lines = [
+            f"{HEADER}{fingerprint(table)}",
+            "# Generated by parsegen.py from the CMinus grammar "
+            "(util/cminus.py). Do not edit.",
+            "",
+            "# panic mode of each nonterminal ends at these terminals "
+            "(see PredictTable.sync)",
+            *[f"SYNC{nt} = {table.sync[nt]!r}" for nt in nonterminals],
+            "",
+            "",
+            "def make(p):",
+            "    \"\"\"returns the functions of the nonterminals (by id) that "
+            "parse with `p`",
+            "",
+            "    Functions add the nodes to `p.parse_tree` and push the "
+            "edges that",
+            "    should be matched on `p.stack` (see "
+            "`GeneratedParser.transit`).",
+            "    \"\"\"",
+            "    add = p.parse_tree.add",
+            "    add_epsilon = p.parse_tree.add_epsilon",
+            "    match = p.match",
+            "    step = p.step_lookahead",
+            "    error = p.log_syntax_error",
+            "    push = p.stack.append",
+            *[f"    label{nt} = p.labels[{nt}]" for nt in nonterminals],
+        ]
+        for nt in nonterminals:
+            lines += [""] + self.nonterminal(nt)
+        for tid in terminals:
+            lines += [""] + self.terminal(tid)
+        lines += [
+            "",
+            f"    return [{', '.join(f'_n{nt}' for nt in nonterminals)}]",
+            "",
+        ]
+        return "\n".join(lines)
+
+
+def build(table, path: Path = MODULE) -> str:
+    """writes the generated module of the table into `path`
+
+    Returns:
+        str: source of the module
+    """
+    source = Generator(table).generate()
+    write_atomic(path, source)
+    return source
+
+
+def load(table, path: Path = MODULE):
+    """imports the generated parser module (see `load_module`)"""
+    return load_module(path, 'cminus_parser', fingerprint(table),
+                       lambda: Generator(table).generate())
+
+
+@lru_cache(maxsize=None)
+def get_generated_parser(table):
+    """Generated parser module of the table (built once and shared)"""
+    return load(table)
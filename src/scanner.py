@@ -1,26 +1,36 @@
 from util.buffer import AllBuffer
 from util.cminus import CMinus
-from util.types_ import TokenType, ErrorType, KEYWORDS, SymbolTable, SIGMA
+from util.scangen import get_generated_language
+from util.types_ import (TokenType, ErrorType, Interner, SymbolTable, Symbol,
+                         SIGMA, W)
 from typing import Tuple
 from util.logger import Logger
+from util.tokens import TokenStore
 
 
 class Scanner:
     """Scanner (Lexer)
 
-    This module will use Buffer and Dfa of the language to get tokens.
+    This module will use Buffer and Dfa of the language to get tokens. By
+    default the compiled (table driven) Dfa is used. The reference Dfa
+    (`CMinus.get_language()`) can be passed as `dfa` for differential checks.
+    A `StreamLogger` can be passed as `logger` to write tokens and errors
+    while scanning. IDs and keywords are interned in `interner` (see
+    `SymbolTable`).
     """
+    BLOCK = 256  # tokens lexed at once by `next_tokens` users
 
-    def __init__(self, buffer=None, file=None) -> None:
-        self.dfa = CMinus.get_language()
+    def __init__(self, buffer=None, file=None, dfa=None, logger=None,
+                 interner: Interner = None) -> None:
+        self.dfa = dfa if dfa else CMinus.get_compiled_language()
         if buffer:
             self.buf = buffer
         elif file:
             self.buf = AllBuffer(file=file)
         else:
             self.buf = AllBuffer()
-        self.symbol_table = SymbolTable()
-        self.logger = Logger()
+        self.symbol_table = SymbolTable(interner)
+        self.logger = logger if logger else Logger()
 
     def get_token(self) -> Tuple[TokenType, str]:
         """returns next token
@@ -33,14 +43,23 @@ class Scanner:
             tok, ret = self.dfa.match(self.buf)
             lexim = self.buf.extract_retreat() if ret else self.buf.extract()
             if tok == TokenType.ID:
-                if lexim in KEYWORDS:
-                    tok = TokenType.KEYWORD
-                else:
-                    self.symbol_table.install(lexim)
+                tok, lexim = self.install_id(lexim)
             return tok, lexim
         except ValueError as e:
             return self.panic(e)
 
+    def install_id(self, lexim) -> Tuple[TokenType, Symbol]:
+        """installs the ID in the symbol table
+
+        Dfas return ID for keywords too, this is the only place that keywords
+        are told apart (by their symbol ids).
+
+        Returns:
+            Tuple[TokenType, Symbol]: KEYWORD if lexim is a keyword, ID
+            otherwise and the interned lexim.
+        """
+        return self.symbol_table.classify(lexim)
+
     def get_next_token(self):
         """Get Next Token
 
@@ -48,8 +67,12 @@ class Scanner:
         token (COMMENT and WHITESPACE tokens will be ignored). 
 
         NOTE: Logging is done inside this function.
+        NOTE: lexims of ignored tokens are not converted to str (see Span).
+        NOTE: lexims of IDs and keywords are Symbols (with their symbol id).
+        NOTE: whitespace runs are skipped in bulk (see `Buffer.skip_while`).
         """
         while True:
+            self.buf.skip_while(W)
             cur_line_no = self.buf.lineno
             tt, lexim = self.get_token()
             if tt in ErrorType:
@@ -58,11 +81,46 @@ class Scanner:
                 if tt in [TokenType.COMMENT, TokenType.WHITESPACE]:
                     continue
                 else:
-                    self.logger.add_token(cur_line_no, str(lexim), tt)
+                    if not isinstance(lexim, str):
+                        lexim = str(lexim)
+                    self.logger.add_token(cur_line_no, lexim, tt)
                     return tt, lexim, cur_line_no
             else:
                 raise TypeError(f'Invalid Type [{tt}]')
 
+    def next_tokens(self, n):
+        """Lexes a block of valuable tokens
+
+        Same as calling `get_next_token` up to `n` times (tokens and errors are
+        logged in the same order), but tokens are lexed in one tight loop, so
+        the per-token overhead of the calls is paid once per block.
+
+        Returns:
+            List[Tuple[TokenType, str, int]]: up to `n` tokens (the block ends
+            early at DOLOR).
+        """
+        tokens = []
+        buf, get_token = self.buf, self.get_token
+        add_token, add_error = self.logger.add_token, self.logger.add_error
+        ignored = (TokenType.COMMENT, TokenType.WHITESPACE)
+        DOLOR = TokenType.DOLOR
+        while len(tokens) < n:
+            buf.skip_while(W)
+            lineno = buf.lineno
+            tt, lexim = get_token()
+            if tt in ignored:
+                continue
+            if type(tt) is ErrorType:
+                add_error(lineno, str(lexim), tt)
+                continue
+            if not isinstance(lexim, str):
+                lexim = str(lexim)
+            add_token(lineno, lexim, tt)
+            tokens.append((tt, lexim, lineno))
+            if tt is DOLOR:
+                break
+        return tokens
+
     def panic(self, e: ValueError):
         """Panic Mode
 
@@ -96,11 +154,103 @@ class Scanner:
         """Iterates through tokens and ignore tokens
 
         This function will iterate through the input file and build logger
-        dictionaries only.
+        dictionaries only (tokens are lexed in blocks, see `next_tokens`).
         """
-        for _, _, _ in self.iterator:
+        while self.next_tokens(self.BLOCK)[-1][0] != TokenType.DOLOR:
             pass
 
+    def tokenize(self, terminal_id) -> TokenStore:
+        """Scans the whole input into a TokenStore
+
+        Tokens (and errors) are logged like `get_next_token`, but valuable
+        tokens are kept in the columns of the store instead of tuples.
+
+        NOTE: buffer should keep the whole input in `file` (e.g. AllBuffer).
+
+        Args:
+            terminal_id (Callable[[TokenType, str], int]): maps a token to its
+            terminal id (e.g. `PredictTable.terminal_id`).
+        """
+        interner = self.symbol_table.interner
+        store = TokenStore(self.buf.file, interner)
+        ignored = (TokenType.COMMENT, TokenType.WHITESPACE)
+        buf = self.buf
+        while True:
+            buf.skip_while(W)
+            start, lineno = buf.forward, buf.lineno
+            tt, lexim = self.get_token()
+            if tt in ErrorType:
+                self.logger.add_error(lineno, str(lexim), tt)
+            elif tt not in ignored:
+                self.logger.add_token(lineno, lexim, tt)
+                store.append(tt, terminal_id(tt, lexim), start,
+                             buf.forward - start, lineno,
+                             interner.id(lexim) if tt == TokenType.ID or
+                             tt == TokenType.KEYWORD else store.NO_SYMBOL)
+                if tt == TokenType.DOLOR:
+                    return store
+
     def dump_log(self, file_tokens=None, file_errors=None, file_symbols=None):
         self.logger.create_log(self.symbol_table.table,
                                file_tokens, file_errors, file_symbols)
+
+
+class RegexScanner(Scanner):
+    """Regex Scanner
+
+    This scanner recognizes tokens with the master pattern of the language
+    (`CMinus.get_pattern()`) which is much faster than walking the Dfa char by
+    char. Whenever the pattern cannot match (i.e. at lexical errors and EOF)
+    the Dfa and panic mode of the Scanner is used, so the outputs are the same.
+
+    NOTE: whitespace runs are returned as a single WHITESPACE token.
+    NOTE: buffer should keep the whole input in `file` (e.g. AllBuffer).
+    """
+
+    def __init__(self, buffer=None, file=None, dfa=None, logger=None,
+                 interner: Interner = None) -> None:
+        super().__init__(buffer, file, dfa, logger, interner)
+        self.pattern = CMinus.get_pattern()
+
+    def get_token(self) -> Tuple[TokenType, str]:
+        m = self.pattern.match(self.buf.file, self.buf.forward)
+        if not m:
+            return super().get_token()
+        tok = TokenType[m.lastgroup]
+        self.buf.advance(m.end() - self.buf.forward - 1)
+        lexim = self.buf.extract()
+        if tok == TokenType.ID:
+            tok, lexim = self.install_id(lexim)
+        return tok, lexim
+
+
+class GeneratedScanner(Scanner):
+    """Generated Scanner
+
+    This scanner uses the scanner module generated from the language (see
+    `util.scangen`). Tokens are matched by `match_text` over the text and
+    sliced out of it, so no buffer method is called per token. Whenever it
+    cannot match (i.e. at manual tails, lexical errors and EOF) the generated
+    Dfa and panic mode of the Scanner is used, so the outputs are the same.
+
+    NOTE: buffer should keep the whole input in `file` (e.g. AllBuffer).
+    """
+
+    def __init__(self, buffer=None, file=None, dfa=None, logger=None,
+                 interner: Interner = None) -> None:
+        super().__init__(buffer, file,
+                         dfa if dfa else get_generated_language(), logger,
+                         interner)
+        self.match_text = self.dfa.module.match_text
+
+    def get_token(self) -> Tuple[TokenType, str]:
+        buf = self.buf
+        m = self.match_text(buf.file, buf.forward)
+        if m is None:
+            return super().get_token()
+        tok, end = m
+        lexim = buf.file[buf.forward:end]
+        buf.beginning = buf.forward = end
+        if tok == TokenType.ID:
+            tok, lexim = self.install_id(lexim)
+        return tok, lexim
@@ -0,0 +1,195 @@
+import io
+import locale
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from cache import Entry, OUTPUTS, ENCODINGS
+from cparser import Parser, TABLE
+from scanner import Scanner
+from util.buffer import AllBuffer
+from util.tree import ParseTree
+from util.types_ import Interner, TokenType
+
+
+@dataclass
+class Stats:
+    """Statistics of compiling a source
+
+    phases: seconds spent in each phase (scan, parse, tree and log).
+    characters: characters scanned.
+    tokens: valuable tokens per TokenType.
+    lexical_errors: panic events of the scanner per ErrorType.
+    syntax_errors: panic events of the parser per kind (missing, illegal
+    and unexpected EOF).
+    expansions: expansions of each nonterminal.
+    max_depth: maximum depth of nonterminals (i.e. depth of `transit`, see
+    `StatsParser`).
+    bytes_written: bytes of each output file.
+    """
+    phases: Dict[str, float] = field(default_factory=Counter)
+    characters: int = 0
+    tokens: Dict[str, int] = field(default_factory=Counter)
+    lexical_errors: Dict[str, int] = field(default_factory=Counter)
+    syntax_errors: Dict[str, int] = field(default_factory=Counter)
+    expansions: Dict[str, int] = field(default_factory=Counter)
+    max_depth: int = 0
+    bytes_written: Dict[str, int] = field(default_factory=Counter)
+
+    def merge(self, other: 'Stats') -> 'Stats':
+        """adds statistics of another source into this one"""
+        for name in ('phases', 'tokens', 'lexical_errors', 'syntax_errors',
+                     'expansions', 'bytes_written'):
+            getattr(self, name).update(getattr(other, name))
+        self.characters += other.characters
+        self.max_depth = max(self.max_depth, other.max_depth)
+        return self
+
+    def report(self) -> str:
+        """formats the statistics"""
+        def counts(counter, limit=None):
+            items = sorted(counter.items(), key=lambda item: -item[1])
+            return ", ".join(f"{key}={value}" for key, value in items[:limit])
+        total = sum(self.phases.values())
+        return "\n".join([
+            "phases: " + ", ".join(f"{phase}={seconds:.4f}s"
+                                   for phase, seconds in self.phases.items())
+            + f" (total {total:.4f}s)",
+            f"characters: {self.characters}"
+            + (f" ({self.characters / total:.0f}/s)" if total else ""),
+            f"tokens: {counts(self.tokens)}",
+            f"lexical errors: {counts(self.lexical_errors) or 0}",
+            f"syntax errors: {counts(self.syntax_errors) or 0}",
+            f"expansions (top 10): {counts(self.expansions, 10)}",
+            f"max depth: {self.max_depth}",
+            f"bytes written: {counts(self.bytes_written)}",
+        ])
+
+
+class StatsScanner(Scanner):
+    """Scanner that times the blocks of tokens that it lexes (see
+    `Scanner.next_tokens`), so scanning can be told apart from parsing while
+    the parser reads the tokens ahead in blocks"""
+
+    def __init__(self, buffer=None, file=None, dfa=None, logger=None,
+                 interner: Interner = None) -> None:
+        super().__init__(buffer, file, dfa, logger, interner)
+        self.seconds = 0.0
+
+    def next_tokens(self, n):
+        start = time.perf_counter()
+        tokens = super().next_tokens(n)
+        self.seconds += time.perf_counter() - start
+        return tokens
+
+
+class StatsParser(Parser):
+    """Parser that counts its panic events per kind and measures the depth of
+    its transit
+
+    Edges on the stack of `transit` carry their depth, so `max_depth` is the
+    maximum depth of the expanded nonterminals (i.e. the depth a recursive
+    descent would reach) measured while parsing.
+    """
+
+    def __init__(self, scanner: Scanner, err=None, tree=None) -> None:
+        super().__init__(scanner, err, tree)
+        self.panics = Counter()
+        self.max_depth = 0
+
+    def log_syntax_error(self, msg):
+        self.panics[msg.split(" ")[0].lower()] += 1
+        super().log_syntax_error(msg)
+
+    def transit(self, diagram='Program', parent_node=ParseTree.NONE):
+        table = self.table
+        stack = [(True, table.nonterminal_ids[diagram], parent_node, 0)]
+        while stack:
+            is_nonterminal, edge, parent, depth = stack.pop()
+            if not is_nonterminal:
+                if self.tid == edge:
+                    self.match(parent)
+                else:
+                    self.log_syntax_error(f"missing " + table.terminals[edge])
+                continue
+            rule = self.predict(edge)
+            if rule == table.NO_RULE:
+                continue
+            self.max_depth = max(self.max_depth, depth)
+            node = self.parse_tree.add(self.labels[edge], parent)
+            edges = table.rules[rule]
+            if not edges:
+                self.match_epsilon(node)
+            else:
+                for is_nonterminal, child in reversed(edges):
+                    stack.append((is_nonterminal, child, node, depth + 1))
+
+
+def expansions(tree: ParseTree) -> Counter:
+    """returns expansions of each nonterminal of the tree"""
+    nonterminals = set(TABLE.nonterminals)
+    counts = Counter()
+    for label, count in Counter(tree.label).items():
+        if tree.labels[label] in nonterminals:
+            counts[tree.labels[label]] = count
+    return counts
+
+
+def compile_stats(text,
+                  interner: Interner = None) -> Tuple[Entry, Stats]:
+    """Compiles the source text with instrumentation
+
+    The text is compiled the same way as `batch.compile_text` (the Parser
+    reads the tokens of the Scanner ahead in blocks and the scanner is
+    drained to EOF after the parse), so outputs are the same. The scan phase
+    is the time spent lexing the blocks (see `StatsScanner`) and the parse
+    phase is the rest of the parse. Other counters are collected from the
+    logger, the parse tree and the outputs after each phase, so the scanner
+    and the parser are not slowed down when statistics are not requested.
+    `interner` is the interner of the symbols (see `compile_text`).
+    """
+    stats = Stats(characters=len(text))
+    clock = time.perf_counter()
+
+    def phase(name):
+        nonlocal clock
+        now = time.perf_counter()
+        stats.phases[name] += now - clock
+        clock = now
+
+    scanner = StatsScanner(AllBuffer(fake=text), interner=interner)
+    outputs = {name: io.StringIO() for name in OUTPUTS}
+    err, tree = outputs['syntax_errors.txt'], outputs['parse_tree.txt']
+    parser = StatsParser(scanner, err, tree)
+    parser.step_lookahead()
+    parse_tree = parser.transit_program()
+    if parser.block[-1][0] != TokenType.DOLOR:
+        scanner.iterate_ignore()  # parser may stop before EOF
+    stats.phases['scan'] = scanner.seconds
+    phase('parse')
+    stats.phases['parse'] -= scanner.seconds
+    parse_tree.write(tree)
+    if not err.tell():
+        err.write('There is no syntax error.')
+    phase('tree')
+    scanner.dump_log(file_tokens=outputs['tokens.txt'],
+                     file_errors=outputs['lexical_errors.txt'],
+                     file_symbols=outputs['symbol_table.txt'])
+    phase('log')
+
+    stats.tokens.update(str(tt) for tokens in scanner.logger.tokens.values()
+                        for tt, _ in tokens)
+    stats.lexical_errors.update(str(tt) for errors in
+                                scanner.logger.errors.values()
+                                for _, tt in errors)
+    stats.syntax_errors.update(parser.panics)
+    stats.expansions = expansions(parse_tree)
+    stats.max_depth = parser.max_depth
+    contents = tuple(outputs[name].getvalue() for name in OUTPUTS)
+    for name, content in zip(OUTPUTS, contents):
+        stats.bytes_written[name] = len(content.encode(
+            ENCODINGS.get(name, locale.getpreferredencoding(False))))
+    entry = Entry(contents, sum(stats.tokens.values()),
+                  sum(stats.lexical_errors.values()), parser.error_count)
+    return entry, stats
@@ -1,3 +1,11 @@
+import io
+import mmap
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
+
 class Buffer:
     """Abstract Buffer class
 
@@ -19,9 +27,9 @@ class Buffer:
     def __init__(self, file="input.txt") -> None:
         """initializes the abstract buffer
 
-        Initialization consist of opening the specified file. If the read method
-        (i.e. 'r') should be overwritten, then child class must provide None as
-        file and open the file itself.
+        Initialization consist of opening the specified file. If the read
+        method (i.e. 'r') should be overwritten, then child class must provide
+        None as file and open the file itself.
 
         Args:
             file (str, required): Name of the file to be buffered. Defaults to 
@@ -41,6 +49,60 @@ class Buffer:
         """
         raise NotImplementedError()
 
+    def advance(self, n: int) -> None:
+        """moves the `forward` pointer `n` steps ahead
+
+        This is equivalent of calling `step` n times (and should maintain
+        lineno the same way) but buffers can implement it in bulk.
+        """
+        for _ in range(n):
+            self.step()
+
+    def step_while(self, chars: str) -> None:
+        """steps `forward` over a run of characters in `chars`
+
+        Unlike `skip_while`, the run is a part of the current lexim (i.e.
+        `beginning` does not move). `chars` should not contain EOT. Buffers can
+        implement it in bulk.
+        """
+        while self() in chars:
+            self.step()
+
+    def skip_while(self, chars: str) -> None:
+        """skips a run of characters in `chars`
+
+        Skipped characters are discarded (like an extracted lexim), so
+        `beginning` and `forward` will be at the first character that is not
+        in `chars`. Buffers can implement it in bulk.
+        """
+        if self() in chars:
+            while self() in chars:
+                self.step()
+            self.extract_retreat()
+
+    def skip_to(self, terminator: str) -> bool:
+        """moves `forward` to the last character of the next `terminator`
+
+        Search starts from `forward` and stops at EOT. The first character of
+        `terminator` should not be repeated in it (e.g. "*/"). Buffers can
+        implement it in bulk.
+
+        Returns:
+            bool: False if EOT is reached before the terminator.
+        """
+        matched = 0
+        while True:
+            c = self()
+            if c == '\x05':
+                return False
+            if c == terminator[matched]:
+                matched += 1
+                if matched == len(terminator):
+                    return True
+            else:
+                matched = 1 if c == terminator[0] else 0
+            self.step()
+
     def extract(self) -> str:
         """extract the token
 
@@ -78,15 +140,25 @@ class Buffer:
         raise NotImplementedError()
 
 
-class AllBuffer(Buffer):
-    """Dummy Buffer
+@lru_cache(maxsize=None)
+def run_pattern(chars: str):
+    """returns pattern of a (possibly empty) run of characters in `chars`"""
+    return re.compile(f"[{re.escape(chars)}]*")
 
-    This Buffer class opens the file and read the whole file. It keep pointers
-    with their real index in the original file and no literal buffering is done.
-    This class should be implemented so we ensure the main part of the scanner
-    works. An appropriate buffer will be implemented later.
 
-    TODO: this implementation is not tested and can be buggy AF.
+class AllBuffer(Buffer):
+    """Whole File Buffer
+
+    This buffer reads the whole file (or takes the `fake` text) into `file`
+    and keeps pointers with their real index in it, so lexims are slices of
+    the text. It is the default buffer and the one that the regex, generated,
+    incremental and parallel scanners need (they match over `file`). Use
+    DoubleBuffer to bound memory by a block size or MmapBuffer to scan the
+    raw bytes of a large file.
+
+    Offsets of the newlines are indexed in bulk when the buffer is created, so
+    stepping does not check for newlines. `lineno` (and `column_of`) are
+    computed by binary search over the index only when they are read.
     """
 
     def __call__(self, *args, **kwds) -> str:
@@ -96,23 +168,74 @@ class AllBuffer(Buffer):
             return self.file[self.forward]
 
     def __init__(self, file="input.txt", fake=None) -> None:
-        if not fake:
+        if fake is None:
             super().__init__(file)
             self.file = self.f.read()
         else:
             self.file = fake
+        self.newlines = array('I', [m.start()
+                                    for m in re.finditer('\n', self.file)])
         self.beginning = 0
         self.forward = 0
-        self.lineno = 1
+        self.line_base = 1
 
     def close(self):
         super().close()
         del self.file
 
+    def newlines_before(self, offset: int) -> int:
+        """returns number of newlines in (0, offset]
+
+        Character of offset 0 is never stepped over, so a newline at 0 is not
+        counted (same as stepping).
+        """
+        count = bisect_right(self.newlines, offset)
+        if count and self.newlines[0] == 0:
+            count -= 1
+        return count
+
+    def line_of(self, offset: int) -> int:
+        """returns line number that the buffer has when forward is `offset`"""
+        return self.line_base + self.newlines_before(offset)
+
+    def column_of(self, offset: int) -> int:
+        """returns column (starting from 1) of the offset in its line"""
+        line = bisect_right(self.newlines, offset - 1)
+        return offset + 1 - (self.newlines[line - 1] + 1 if line else 0)
+
+    @property
+    def lineno(self) -> int:
+        return self.line_of(self.forward)
+
+    @lineno.setter
+    def lineno(self, lineno: int) -> None:
+        self.line_base = lineno - self.newlines_before(self.forward)
+
     def step(self) -> None:
         self.forward = min(len(self.file), self.forward + 1)
-        if self.__call__() == '\n':
-            self.lineno += 1
+
+    def advance(self, n: int) -> None:
+        self.forward = min(len(self.file), self.forward + n)
+
+    def step_while(self, chars: str) -> None:
+        self.forward = run_pattern(chars).match(self.file, self.forward).end()
+
+    def skip_while(self, chars: str) -> None:
+        self.forward = run_pattern(chars).match(self.file, self.forward).end()
+        self.beginning = self.forward
+
+    def skip_to(self, terminator: str) -> bool:
+        file = self.file
+        end = file.find(terminator, self.forward)
+        eot = file.find('\x05', self.forward, len(file) if end == -1 else end)
+        if eot != -1:
+            self.forward = eot
+            return False
+        if end == -1:
+            self.forward = len(file)
+            return False
+        self.forward = end + len(terminator) - 1
+        return True
 
     def extract(self) -> str:
         retval = self.file[self.beginning:self.forward+1]
@@ -127,3 +250,211 @@ class AllBuffer(Buffer):
 
     def get_lineno(self) -> int:
         return self.lineno
+
+
+class DoubleBuffer(Buffer):
+    """Double Buffer
+
+    This buffer reads the file in blocks of `block_size` characters into two
+    halves. Each half is terminated with the EOT sentinel, so the end of a half
+    is only checked when the sentinel is read. Whenever `forward` reaches the
+    sentinel of a full half, next block is loaded into the other half.
+
+    `beginning` and `forward` are offsets in the file (same as AllBuffer). If
+    the half that `beginning` is in should be reloaded, the part of the lexim
+    that is in it is kept in `pending`. So memory is bounded by the block size
+    and the longest lexim (instead of the file size).
+    """
+
+    def __call__(self, *args, **kwds) -> str:
+        return self.halves[self.half][self.pos]
+
+    def __init__(self, file="input.txt", block_size=4096, fake=None) -> None:
+        if fake is None:
+            super().__init__(file)
+        else:
+            self.f = io.StringIO(fake)
+        self.block_size = block_size
+        self.halves = ["", ""]
+        self.bases = [0, 0]
+        self.half = 0
+        self.pos = 0
+        self.pending = []
+        self.beginning = 0
+        self.lineno = 1
+        self.load(0, 0)
+
+    @property
+    def forward(self) -> int:
+        return self.bases[self.half] + self.pos
+
+    def load(self, half, base):
+        """reads the next block into `half` and puts sentinel at its end"""
+        self.halves[half] = self.f.read(self.block_size) + '\x05'
+        self.bases[half] = base
+
+    def switch(self):
+        """moves forward to the beginning of the next block
+
+        The other half will be overwritten, so if the current lexim starts
+        before current half, its characters in the other half are kept.
+        """
+        other = 1 - self.half
+        if self.beginning < self.bases[self.half]:
+            base = self.bases[other]
+            start = max(self.beginning, base) - base
+            self.pending.append(self.halves[other][start:-1])
+        self.load(other, self.bases[self.half] + self.block_size)
+        self.half = other
+        self.pos = 0
+
+    def step(self) -> None:
+        half = self.halves[self.half]
+        if half[self.pos] == '\x05' and self.pos == len(half) - 1:
+            return  # EOF (sentinel of a full half is never the forward)
+        self.pos += 1
+        c = half[self.pos]
+        if c == '\x05' and self.pos == len(half) - 1 \
+                and len(half) > self.block_size:
+            self.switch()
+            c = self.halves[self.half][0]
+        if c == '\n':
+            self.lineno += 1
+
+    def lexim(self, end) -> str:
+        """returns [beginning, end) of the file"""
+        cur = self.halves[self.half]
+        base = self.bases[self.half]
+        end = min(end - base, len(cur) - 1)
+        if self.beginning >= base:
+            return cur[self.beginning - base:end]
+        other = 1 - self.half
+        start = max(self.beginning, self.bases[other]) - self.bases[other]
+        return "".join(self.pending) + self.halves[other][start:-1] + \
+            cur[:end]
+
+    def extract(self) -> str:
+        retval = self.lexim(self.forward + 1)
+        self.step()
+        self.beginning = self.forward
+        self.pending = []
+        return retval
+
+    def extract_retreat(self) -> str:
+        retval = self.lexim(self.forward)
+        self.beginning = self.forward
+        self.pending = []
+        return retval
+
+    def get_lineno(self) -> int:
+        return self.lineno
+
+
+class Span:
+    """Lexim of a MmapBuffer
+
+    Span is an (offset, length) pair over the raw bytes of the input. It is
+    decoded only when it is converted to str (e.g. when it is logged or
+    installed in the symbol table), so whitespace and comments are never
+    copied out of the buffer.
+    """
+    __slots__ = ('data', 'offset', 'length')
+
+    def __init__(self, data, offset, length) -> None:
+        self.data = data
+        self.offset = offset
+        self.length = length
+
+    def __str__(self) -> str:
+        raw = self.data[self.offset:self.offset + self.length]
+        # same as universal newlines of the text mode
+        return raw.decode().replace('\r\n', '\n').replace('\r', '\n')
+
+    def __repr__(self) -> str:
+        return f"Span({self.offset}, {self.length}, {str(self)!r})"
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other) -> bool:
+        return str(self) == str(other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+class MmapBuffer(Buffer):
+    """Memory mapped Buffer
+
+    This buffer maps the file into memory and scans its raw bytes without
+    decoding it. Pointers are byte offsets and `extract`/`extract_retreat`
+    return `Span`s instead of strings. Multi-byte (utf-8) characters are
+    stepped over at once and read as a single invalid character, so the tokens
+    are the same as the text mode buffers.
+
+    NOTE: spans should be converted to str before the buffer is closed.
+    """
+    # character of each byte (bytes >= 0x80 are not in SIGMA)
+    CHARS = [chr(i) for i in range(256)]
+    # length of utf-8 sequence from its first byte
+    WIDTHS = bytes([1] * 0xC0 + [2] * 0x20 + [3] * 0x10 + [4] * 0x10)
+
+    def __call__(self, *args, **kwds) -> str:
+        if self.forward == self.size:
+            return '\x05'
+        else:
+            return self.CHARS[self.data[self.forward]]
+
+    def __init__(self, file="input.txt", fake=None) -> None:
+        super().__init__(None)
+        self.f = self.mm = None
+        if fake is not None:
+            self.data = fake.encode() if isinstance(fake, str) else fake
+        else:
+            self.f = open(file, 'rb')
+            try:
+                self.mm = mmap.mmap(self.f.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+                self.data = self.mm
+            except ValueError:  # empty files cannot be mapped
+                self.data = b""
+        self.size = len(self.data)
+        self.beginning = 0
+        self.forward = 0
+        self.lineno = 1
+
+    def close(self):
+        if self.mm:
+            self.mm.close()
+        if self.f:
+            self.f.close()
+
+    def next_offset(self) -> int:
+        """offset of the character after forward"""
+        if self.forward == self.size:
+            return self.size
+        return min(self.size,
+                   self.forward + self.WIDTHS[self.data[self.forward]])
+
+    def step(self) -> None:
+        self.forward = self.next_offset()
+        if self.forward < self.size:
+            c = self.data[self.forward]
+            # "\r\n" and "\r" are newlines (see Span.__str__)
+            if c == 13 or (c == 10 and self.data[self.forward - 1] != 13):
+                self.lineno += 1
+
+    def extract(self) -> Span:
+        retval = Span(self.data, self.beginning,
+                      self.next_offset() - self.beginning)
+        self.step()
+        self.beginning = self.forward
+        return retval
+
+    def extract_retreat(self) -> Span:
+        retval = Span(self.data, self.beginning, self.forward - self.beginning)
+        self.beginning = self.forward
+        return retval
+
+    def get_lineno(self) -> int:
+        return self.lineno
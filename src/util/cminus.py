@@ -2,6 +2,8 @@ from util.dfa import *
 from util.types_ import classproperty
 from util.types_ import *
 import json
+import re
+from functools import lru_cache
 
 
 class AsteriskTail(DfaTail):
@@ -18,19 +20,11 @@ class AsteriskTail(DfaTail):
 
 class CommentTail(DfaTail):
     def match_end(self, buffer):
-        state = 0
-        while True:
-            c = buffer()
-            if c == EOT:
-                raise ValueError(ErrorType.UNCLOSED_COMMENT)
-            if state == 0 and c == "*":
-                state = 1
-            elif state == 1:
-                if c == "/":
-                    return TokenType.COMMENT, False
-                elif c != "*":
-                    state = 0
-            buffer.step()
+        """matches the body of the comment and its "*/" with one search of
+        the buffer (see `Buffer.skip_to`)"""
+        if not buffer.skip_to("*/"):
+            raise ValueError(ErrorType.UNCLOSED_COMMENT)
+        return TokenType.COMMENT, False
 
     def match(self, buffer) -> Tuple[TokenType, bool]:
         buffer.step()
@@ -61,6 +55,41 @@ class CMinus:
             ]
         )
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_compiled_language() -> CompiledDfa:
+        """Table driven version of the language
+
+        Compiled dfa does not keep any state so it is compiled once and shared.
+        """
+        return CompiledDfa(CMinus.get_language())
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_pattern() -> re.Pattern:
+        """Master pattern of the language
+
+        A single regular expression with one named group per token type (group
+        names are `TokenType` names). It only matches tokens that the Dfa
+        accepts with the same lexim, so anything it cannot match (including
+        EOF) should be handed to the Dfa.
+        """
+        def cls(chars, negate=False):
+            return ("[^" if negate else "[") + \
+                "".join(re.escape(c) for c in chars) + "]"
+        other = f"(?={cls(SPEC + W + EOT)}|\\Z)"
+        equals_other = f"(?={cls(L + D + W + S + '*/' + EOT)}|\\Z)"
+        asterisk_other = f"(?={cls(SIGMA.replace('/', ''))}|\\Z)"
+        body = cls("*" + EOT, negate=True)
+        tail = cls("/*" + EOT, negate=True)
+        return re.compile("|".join([
+            f"(?P<WHITESPACE>{cls(W)}+)",
+            f"(?P<ID>{cls(L)}{cls(L + D)}*){other}",
+            f"(?P<NUM>{cls(D)}+){other}",
+            f"(?P<SYMBOL>==|={equals_other}|{cls(S)}|\\*{asterisk_other})",
+            f"(?P<COMMENT>/\\*{body}*\\*+(?:{tail}{body}*\\*+)*/)",
+        ]))
+
     @staticmethod
     def whitespace_tail() -> DfaTail:
         return AutoTail(
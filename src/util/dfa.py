@@ -141,3 +141,141 @@ class AutoTail(DfaTail):
             return state.callback(), state.is_retreat
         else:
             return self.type, state.is_retreat
+
+
+class CompiledDfa(Dfa):
+    """Table driven Dfa
+
+    This class compiles the `AutoTail`s of a Dfa into a dense character-class
+    table and a flat state x class transition matrix, so matching a character
+    costs two list lookups instead of scanning the `Transition.literal`
+    strings. Keywords are matched as IDs (the Scanner tells them apart by
+    their symbol ids, see `SymbolTable.classify`), like the other backends.
+
+    Tails that are not `AutoTail`s (or have callbacks) cannot be compiled and
+    are called as they are (i.e. manual tails). The original Dfa is kept as
+    the reference backend.
+    """
+
+    ERROR = -1
+
+    def __init__(self, dfa: Dfa) -> None:
+        """compiles a Dfa
+
+        Args:
+            dfa (Dfa): reference dfa which its tails will be compiled.
+        """
+        self.tails = dfa.tails
+        self._build_classes()
+        self._build_states()
+
+    def _build_classes(self):
+        """partitions the alphabet into character classes
+
+        Two characters are in the same class if they are in the same literals
+        (entries and transitions). EOT is distinguished so it can be told
+        apart at the start state. Class 0 is the class of characters
+        that are not in any literal (e.g. non-ascii characters).
+        """
+        literals = [entry for entry, _ in self.tails]
+        for _, tail in self.tails:
+            if self._compilable(tail):
+                for state in tail.states:
+                    literals += [t.literal for t in state.transitions]
+        signatures = {(False,) * len(literals) + (None,): 0}
+        self.classes = [0] * 128
+        self.representatives = [None]
+        for o in range(128):
+            c = chr(o)
+            sig = tuple(c in lit for lit in literals)
+            sig += (c if c == EOT else None,)
+            if sig not in signatures:
+                signatures[sig] = len(self.representatives)
+                self.representatives.append(c)
+            self.classes[o] = signatures[sig]
+        self.nclasses = len(self.representatives)
+
+    @staticmethod
+    def _compilable(tail) -> bool:
+        return isinstance(tail, AutoTail) and not any(
+            getattr(state, 'callback', None) for state in tail.states)
+
+    def _build_states(self):
+        """builds the transition matrix with a breadth first search
+
+        Compiled states are (tail, tail state) pairs. State 0 is the start
+        state of the Dfa.
+        """
+        ids = {}
+        queue = []
+        self.accept = [None]
+        self.errors = [ErrorType.INVALID_INPUT]
+
+        def state_id(key):
+            if key not in ids:
+                tail, idx = key
+                state = tail.states[idx]
+                if state.is_accepting:
+                    self.accept.append((tail.type, state.is_retreat))
+                else:
+                    self.accept.append(None)
+                self.errors.append(tail.error)
+                ids[key] = len(self.accept) - 1
+                queue.append(key)
+            return ids[key]
+
+        self.start = [self.ERROR] * self.nclasses
+        self.manual = [None] * self.nclasses
+        for k, c in enumerate(self.representatives):
+            if c is None:
+                continue
+            for entry, tail in self.tails:
+                if c in entry:
+                    if self._compilable(tail):
+                        self.start[k] = state_id((tail, 0))
+                    else:
+                        self.manual[k] = tail
+                    break
+
+        rows = {}
+        while queue:
+            key = queue.pop(0)
+            tail, idx = key
+            state = tail.states[idx]
+            row = [self.ERROR] * self.nclasses
+            if not state.is_accepting:
+                for k, c in enumerate(self.representatives):
+                    if c is None:
+                        continue
+                    for t in state.transitions:
+                        if c in t.literal:
+                            row[k] = state_id((tail, t.next_state))
+                            break
+            rows[ids[key]] = row
+        self.delta = [self.ERROR] * self.nclasses
+        for i in range(1, len(self.accept)):
+            self.delta += rows[i]
+
+    def match(self, buffer) -> Tuple[TokenType, bool]:
+        """accepts input (see Dfa.match)"""
+        c = buffer()
+        o = ord(c)
+        k = self.classes[o] if o < 128 else 0
+        state = self.start[k]
+        if state == self.ERROR:
+            if self.manual[k]:
+                return self.manual[k].match(buffer)
+            if c == EOT:
+                return TokenType.DOLOR, False
+            raise ValueError(ErrorType.INVALID_INPUT)
+        classes, delta, n = self.classes, self.delta, self.nclasses
+        accept = self.accept
+        step = buffer.step
+        while not accept[state]:
+            step()
+            o = ord(buffer())
+            nxt = delta[state * n + (classes[o] if o < 128 else 0)]
+            if nxt == self.ERROR:
+                raise ValueError(self.errors[state])
+            state = nxt
+        return accept[state]
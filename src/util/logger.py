@@ -5,6 +5,51 @@ from typing import Dict
 from util.types_ import TokenType, ErrorType
 
 
+class BudgetExceeded(Exception):
+    """raised when an error is reported after the budget is spent (in the
+    stop mode of ErrorBudget)"""
+
+
+class ErrorBudget:
+    """Error Budget
+
+    Counts the lexical and syntax errors of a source (it is shared by the
+    logger of the scanner and the parser). The first `limit` errors are
+    logged. After that, errors are only counted, or if `stop` is True,
+    BudgetExceeded is raised so compilation is stopped early.
+    """
+
+    def __init__(self, limit: int, stop=False) -> None:
+        self.limit = limit
+        self.stop = stop
+        self.count = 0
+
+    @property
+    def exceeded(self) -> bool:
+        return self.count > self.limit
+
+    @property
+    def stopped(self) -> bool:
+        """whether compilation is stopped by the budget"""
+        return self.stop and self.exceeded
+
+    def spend(self) -> bool:
+        """counts an error
+
+        Returns:
+            bool: whether the error should be logged.
+
+        Raises:
+            BudgetExceeded: if the budget is spent in the stop mode.
+        """
+        self.count += 1
+        if self.count <= self.limit:
+            return True
+        if self.stop:
+            raise BudgetExceeded(f"more than {self.limit} errors")
+        return False
+
+
 class Logger:
     Token = Tuple[TokenType, str]
 
@@ -33,30 +78,25 @@ class Logger:
         """
         self.tokens = {}
         self.errors = {}
+        self.budget: ErrorBudget = None
+        self.dropped_errors = 0  # errors that were only counted (see budget)
 
     def create_string(self, token_dict):
-        string = ""
-        for key, item in token_dict.items():
-            line = ""
-            for entry0, entry1 in item:
-                line += f"({entry0}, {entry1}) "
-            line += "\n"
-            if line != "\n":
-                string += str(key) + ".\t" + line
-        return string
+        return "".join(
+            f"{key}.\t" + "".join(f"({entry0}, {entry1}) "
+                                  for entry0, entry1 in item) + "\n"
+            for key, item in token_dict.items() if item)
 
     def create_tokens_string(self):
         return self.create_string(self.tokens)
 
     def create_symbol_table_string(self, symbol_table: dict):
-        symbol_table_string = ""
-        for i, entry in enumerate(symbol_table.keys()):
-            symbol_table_string += f"{i + 1}.\t{entry}\n"
-        return symbol_table_string
+        return "".join(f"{i + 1}.\t{entry}\n"
+                       for i, entry in enumerate(symbol_table.keys()))
 
     def create_errors_string(self):
         errors_string = self.create_string(self.errors)
-        if errors_string == "":
+        if errors_string == "" and not self.dropped_errors:
             return "There is no lexical error."
         return errors_string
 
@@ -85,6 +125,15 @@ class Logger:
                 symbol_table), file=file_symbols)
 
     def add_error(self, cur_line_no, lexim, tt):
+        if self.budget is not None:
+            try:
+                logged = self.budget.spend()
+            except BudgetExceeded:  # it is counted like a syntax error
+                self.dropped_errors += 1
+                raise
+            if not logged:
+                self.dropped_errors += 1
+                return
         err = (lexim[:7] + "..." if len(lexim) > 6 else lexim, tt)
         if cur_line_no in self.errors:
             self.errors[cur_line_no].append(err)
@@ -98,3 +147,70 @@ class Logger:
             self.tokens[cur_line_no].append((tt, lexim))
         else:
             self.tokens[cur_line_no] = [(tt, lexim)]
+
+    def merge(self, log: 'Logger', line_delta=0):
+        """adds the tokens and errors of `log` after the logged ones (its
+        line numbers are moved by `line_delta`)
+
+        Lines are merged as a whole. Errors of `log` are not spent from the
+        budget of this logger.
+        """
+        for merged, lines in ((self.tokens, log.tokens),
+                              (self.errors, log.errors)):
+            for line, entries in lines.items():
+                merged.setdefault(line + line_delta, []).extend(entries)
+        self.dropped_errors += log.dropped_errors
+
+
+class StreamLogger(Logger):
+    """Streaming Logger
+
+    Line numbers of the logged tokens (and errors) never decrease, so a line
+    of tokens.txt (or lexical_errors.txt) is complete as soon as a token of a
+    later line is logged. This logger writes each line into its file at that
+    point, so `tokens` and `errors` only keep the current line. Outputs are
+    the same as Logger.
+    """
+
+    def __init__(self, file_tokens, file_errors):
+        super().__init__()
+        self.file_tokens = file_tokens
+        self.file_errors = file_errors
+        self.has_errors = False
+
+    def add_error(self, cur_line_no, lexim, tt):
+        if self.errors and cur_line_no not in self.errors:
+            self.flush_errors()
+        super().add_error(cur_line_no, lexim, tt)
+
+    def add_token(self, cur_line_no, lexim, tt):
+        if self.tokens and cur_line_no not in self.tokens:
+            self.flush_tokens()
+        super().add_token(cur_line_no, lexim, tt)
+
+    def flush_errors(self):
+        self.has_errors = True
+        self.file_errors.write(self.create_string(self.errors))
+        self.errors.clear()
+
+    def flush_tokens(self):
+        self.file_tokens.write(self.create_string(self.tokens))
+        self.tokens.clear()
+
+    def create_log(self, symbol_table, file_tokens=None, file_errors=None,
+                   file_symbols=None):
+        """writes the last lines and the symbol table
+
+        Tokens and errors are already written in the files of the logger, so
+        `file_tokens` and `file_errors` are ignored.
+        """
+        if self.errors:
+            self.flush_errors()
+        if not self.has_errors and not self.dropped_errors:
+            self.file_errors.write("There is no lexical error.")
+        self.flush_tokens()
+        string = self.create_symbol_table_string(symbol_table)
+        if file_symbols is None:
+            self.save_as_text(string, file_name="symbol_table.txt")
+        else:
+            self.save_as_text(string, file=file_symbols)
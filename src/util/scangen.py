@@ -0,0 +1,284 @@
+import hashlib
+import importlib.util
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from util import cminus, dfa, types_
+from util.dfa import Dfa, AutoTail
+from util.types_ import EOT
+
+# generated module (it is rebuilt if its fingerprint is not `fingerprint()`)
+MODULE = Path(__file__).with_name('cminus_scanner.py')
+HEADER = "# fingerprint: "
+
+
+@lru_cache(maxsize=1)
+def fingerprint() -> str:
+    """hash of the sources that the generated module is made of (the
+    language definition, the Dfa classes, the alphabets and this generator)"""
+    digest = hashlib.sha256()
+    for module in (cminus, dfa, types_):
+        digest.update(Path(module.__file__).read_bytes())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+class Generator:
+    """Generator of the scanner module of a Dfa
+
+    Each AutoTail is generated as a function with straight-line code: a state
+    is stepped into, its self loop (if any) is a single `Buffer.step_while`
+    and its other transitions are nested `if`s on the character. So states
+    are not looked up and transitions are not iterated while matching.
+
+    Tails whose states have other cycles or callbacks (and manual tails) are
+    called as they are, like `CompiledDfa`. First characters are dispatched
+    with a dict.
+
+    Each tail is also generated over a str (`match_text`) for the buffers that
+    keep the whole input (see `GeneratedScanner`), where a self loop is one
+    regex match and no buffer method is called.
+    """
+
+    def __init__(self, dfa: Dfa) -> None:
+        self.dfa = dfa
+        self.constants = {}
+        self.runs = {}
+
+    def constant(self, chars: str) -> str:
+        """name of the module level constant of a set of characters"""
+        if chars not in self.constants:
+            self.constants[chars] = f"_C{len(self.constants)}"
+        return self.constants[chars]
+
+    def run(self, chars: str) -> str:
+        """name of the `match` method of the run pattern of the characters"""
+        if chars not in self.runs:
+            self.runs[chars] = f"_R{len(self.runs)}"
+        return self.runs[chars]
+
+    @staticmethod
+    def generable(tail) -> bool:
+        """whether the tail is an AutoTail without callbacks and its states
+        are a DAG (except self loops)"""
+        if not isinstance(tail, AutoTail) or any(
+                getattr(state, 'callback', None) for state in tail.states):
+            return False
+        visiting, done = set(), set()
+
+        def acyclic(idx):
+            if idx in visiting:
+                return False
+            if idx in done:
+                return True
+            visiting.add(idx)
+            ok = all(acyclic(t.next_state)
+                     for t in tail.states[idx].transitions
+                     if t.next_state != idx)
+            visiting.discard(idx)
+            done.add(idx)
+            return ok
+        return acyclic(0)
+
+    def state(self, tail, idx: int, indent: str) -> List[str]:
+        """code of matching from state `idx` (the buffer is at the character
+        that moved into the state)"""
+        state = tail.states[idx]
+        if state.is_accepting:
+            return [f"{indent}return {tail.type.name}, {state.is_retreat}"]
+        lines = [f"{indent}buffer.step()"]
+        seen = ""
+        loop = ""
+        for t in state.transitions:
+            if t.next_state == idx:
+                loop += "".join(c for c in t.literal if c not in seen)
+            seen += t.literal
+        if loop:
+            if EOT in loop:
+                raise ValueError("EOF can not be in a self loop")
+            lines.append(f"{indent}buffer.step_while({self.constant(loop)})")
+        lines.append(f"{indent}c = buffer()")
+        for t in state.transitions:
+            if t.next_state == idx:
+                continue
+            lines.append(f"{indent}if c in {self.constant(t.literal)}:")
+            lines += self.state(tail, t.next_state, indent + "    ")
+        lines.append(f"{indent}raise ValueError(ErrorType.{tail.error.name})")
+        return lines
+
+    def text_state(self, tail, idx: int, indent: str) -> List[str]:
+        """code of matching from state `idx` over the text (`j` is the offset
+        of the character that moved into the state)"""
+        state = tail.states[idx]
+        if state.is_accepting:
+            end = "j" if state.is_retreat else "j + 1"
+            return [f"{indent}return {tail.type.name}, {end}"]
+        lines = [f"{indent}j += 1"]
+        seen = ""
+        loop = ""
+        for t in state.transitions:
+            if t.next_state == idx:
+                loop += "".join(c for c in t.literal if c not in seen)
+            seen += t.literal
+        if loop:
+            lines.append(f"{indent}j = {self.run(loop)}(text, j).end()")
+        lines.append(f"{indent}c = text[j] if j < len(text) else {EOT!r}")
+        for t in state.transitions:
+            if t.next_state == idx:
+                continue
+            lines.append(f"{indent}if c in {self.constant(t.literal)}:")
+            lines += self.text_state(tail, t.next_state, indent + "    ")
+        lines.append(f"{indent}return None")
+        return lines
+
+    def generate(self) -> str:
+        """returns source of the module"""
+        body, starts, text_starts = [], [], []
+        for k, (entry, tail) in enumerate(self.dfa.tails):
+            name = f"_tail{k}"
+            if self.generable(tail):
+                body += ["", "", f"def {name}(buffer):",
+                         f"    # {type(tail).__name__} of {tail.type}"]
+                body += self.state(tail, 0, "    ")
+                body += ["", "", f"def {name}_text(text, j):"]
+                body += self.text_state(tail, 0, "    ")
+                text_starts.append((entry, f"{name}_text"))
+            else:
+                body += ["", "", f"{name} = LANGUAGE.tails[{k}][1].match"]
+                text_starts.append((entry, None))
+            starts.append((entry, name))
+        start = ["", ""]
+        for table, entries in (("_START", starts), ("_TEXT", text_starts)):
+            start.append(f"{table} = {{}}")
+            for entry, name in reversed(entries):  # first entry wins
+                start.append(
+                    f"{table}.update(dict.fromkeys({entry!r}, {name}))")
+        constants = [f"{name} = {chars!r}"
+                     for chars, name in self.constants.items()]
+        constants += [f"{name} = re.compile({f'[{re.escape(chars)}]*'!r})"
+                      f".match" for chars, name in self.runs.items()]
+        return "\n".join([
+            f"{HEADER}{fingerprint()}",
+            "# Generated by util/scangen.py from the CMinus language "
+            "(util/cminus.py). Do not edit.",
+            "import re",
+            "",
+            "from util.cminus import CMinus",
+            "from util.types_ import TokenType, ErrorType",
+            "",
+            "LANGUAGE = CMinus.get_language()",
+            *[f"{tt} = TokenType.{tt}" for tt in
+              sorted({tail.type.name for _, tail in self.dfa.tails
+                      if self.generable(tail)} | {'DOLOR'})],
+            *constants,
+            *body,
+            *start,
+            "",
+            "",
+            "def match(buffer):",
+            "    \"\"\"accepts input (see Dfa.match)\"\"\"",
+            "    c = buffer()",
+            "    tail = _START.get(c)",
+            "    if tail is not None:",
+            "        return tail(buffer)",
+            f"    if c == {EOT!r}:",
+            "        return DOLOR, False",
+            "    raise ValueError(ErrorType.INVALID_INPUT)",
+            "",
+            "",
+            "def match_text(text, i):",
+            "    \"\"\"accepts the token at offset i of the text",
+            "",
+            "    Returns:",
+            "        Tuple[TokenType, int]: type and end offset of the token",
+            "        or None if the Dfa should match it (manual tails, errors",
+            "        and EOF).",
+            "    \"\"\"",
+            "    if i < len(text):",
+            "        tail = _TEXT.get(text[i])",
+            "        if tail is not None:",
+            "            return tail(text, i)",
+            "    return None",
+            "",
+        ])
+
+
+def write_atomic(path: Path, source: str) -> None:
+    """writes the source of a generated module into `path` (a reader never
+    sees a partial module)"""
+    fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(source)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def is_stale(path: Path = MODULE, digest: str = None) -> bool:
+    """whether the generated module is missing or has another fingerprint"""
+    digest = digest if digest else fingerprint()
+    try:
+        with open(path) as f:
+            return f.readline().rstrip('\n') != HEADER + digest
+    except OSError:
+        return True
+
+
+def load_module(path: Path, name: str, digest: str, generate):
+    """imports a generated module (it is written by `generate()` first if it
+    is stale)
+
+    If the module can not be written (e.g. a read-only install), it is
+    generated in memory.
+    """
+    if is_stale(path, digest):
+        source = generate()
+        try:
+            write_atomic(path, source)
+        except OSError:
+            module = type(os)(name)
+            exec(compile(source, str(path), 'exec'), module.__dict__)
+            return module
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build(path: Path = MODULE) -> str:
+    """writes the generated module of the language into `path`
+
+    Returns:
+        str: source of the module
+    """
+    source = Generator(cminus.CMinus.get_language()).generate()
+    write_atomic(path, source)
+    return source
+
+
+def load(path: Path = MODULE):
+    """imports the generated scanner module (see `load_module`)"""
+    return load_module(
+        path, 'cminus_scanner', fingerprint(),
+        lambda: Generator(cminus.CMinus.get_language()).generate())
+
+
+class GeneratedDfa(Dfa):
+    """Dfa of the generated scanner module (see `Generator`)"""
+
+    def __init__(self, module) -> None:
+        super().__init__(module.LANGUAGE.tails)
+        self.module = module
+        self.match = module.match
+
+
+@lru_cache(maxsize=None)
+def get_generated_language() -> GeneratedDfa:
+    """Generated version of the language (built once and shared)"""
+    return GeneratedDfa(load())
@@ -0,0 +1,64 @@
+from array import array
+from typing import Tuple
+
+from util.types_ import TokenType, Interner
+
+TYPES = tuple(TokenType)
+
+
+class TokenStore:
+    """Token Store
+
+    Compact token stream kept as columns (struct of arrays) instead of a list
+    of (TokenType, str, lineno) tuples:
+    `kinds` (uint8 TokenType value), `tids` (uint8 terminal id of the parser),
+    `starts` (uint32 offset in `text`), `lengths` (uint32), `lines` (uint32)
+    and `symbols` (symbol id in `interner` or NO_SYMBOL).
+
+    Lexims are not kept. They are materialized on demand (see `lexim`) from
+    the symbol (IDs and keywords) or `text`.
+    """
+    NO_SYMBOL = -1
+
+    def __init__(self, text: str, interner: Interner) -> None:
+        self.text = text
+        self.interner = interner
+        self.kinds = array('B')
+        self.tids = array('B')
+        self.starts = array('I')
+        self.lengths = array('I')
+        self.lines = array('I')
+        self.symbols = array('i')
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, kind: TokenType, tid: int, start: int, length: int,
+               line: int, symbol: int = NO_SYMBOL) -> None:
+        self.kinds.append(kind.value)
+        self.tids.append(tid)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+        self.symbols.append(symbol)
+
+    def kind(self, i: int) -> TokenType:
+        return TYPES[self.kinds[i]]
+
+    def lexim(self, i: int) -> str:
+        """materializes the lexim of the i-th token"""
+        symbol = self.symbols[i]
+        if symbol != self.NO_SYMBOL:
+            return self.interner.symbols[symbol]
+        start = self.starts[i]
+        return self.text[start:start + self.lengths[i]]
+
+    def __getitem__(self, i: int) -> Tuple[TokenType, str, int]:
+        """returns the i-th token as (type, lexim, lineno)"""
+        return self.kind(i), self.lexim(i), self.lines[i]
+
+    def nbytes(self) -> int:
+        """memory used by the columns (in bytes)"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.kinds, self.tids, self.starts,
+                                  self.lengths, self.lines, self.symbols))
@@ -0,0 +1,202 @@
+from array import array
+
+
+class ParseTree:
+    """Parse Tree
+
+    Compact tree built by the parser. Nodes are indexes in parallel arrays
+    (label, parent, first child, last child and next sibling) instead of
+    objects, and labels are interned in `labels`, so repeated labels (e.g.
+    nonterminals and terminals like "(SYMBOL, ;)") are stored once.
+
+    Epsilon leaves are all the same node (EPSILON), which is possible because
+    epsilon is always the only child of its parent. So parent of EPSILON is
+    NONE.
+
+    Trees can share their interned labels (see `like`), so subtrees can be
+    grafted into each other without mapping the labels.
+    """
+    NONE = -1
+    EPSILON = 0
+
+    def __init__(self, like=None) -> None:
+        """initializes an empty tree
+
+        Args:
+            like (ParseTree, optional): the tree that its labels will be shared
+            with this tree.
+        """
+        self.labels = like.labels if like else []
+        self.label_ids = like.label_ids if like else {}
+        self.label = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.last_child = array('i')
+        self.next_sibling = array('i')
+        self.root = self.NONE
+        self.add(self.intern('epsilon'))
+        self.root = self.NONE
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    def intern(self, label: str) -> int:
+        """returns id of the label (label will be added if it is new)"""
+        label_id = self.label_ids.get(label)
+        if label_id is None:
+            label_id = self.label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def add(self, label_id: int, parent: int = NONE) -> int:
+        """adds a node as the last child of `parent`
+
+        Args:
+            label_id (int): interned label of the node (see `intern`).
+            parent (int, optional): parent of the node. If parent is NONE, node
+            will be the root of the tree.
+
+        Returns:
+            int: index of the node
+        """
+        node = len(self.label)
+        self.label.append(label_id)
+        self.parent.append(parent)
+        self.first_child.append(self.NONE)
+        self.last_child.append(self.NONE)
+        self.next_sibling.append(self.NONE)
+        if parent == self.NONE:
+            self.root = node
+        elif self.last_child[parent] == self.NONE:
+            self.first_child[parent] = self.last_child[parent] = node
+        else:
+            self.next_sibling[self.last_child[parent]] = node
+            self.last_child[parent] = node
+        return node
+
+    def add_epsilon(self, parent: int) -> None:
+        """adds the shared epsilon leaf as the only child of `parent`"""
+        self.first_child[parent] = self.last_child[parent] = self.EPSILON
+
+    def graft(self, other, parent: int) -> None:
+        """adds `other` tree as the last child of `parent`
+
+        Nodes of `other` are spliced as one range: its arrays are appended
+        with the links moved by the offset of the range, so nodes are not
+        added one by one (labels are mapped if they are not shared).
+
+        NOTE: all nodes of `other` should be in the tree of its root (as in
+        the trees built by the parsers).
+        """
+        if other.root == self.NONE:
+            return
+        if other.labels is self.labels:
+            labels = other.label[1:]
+        else:
+            mapping = [self.intern(label) for label in other.labels]
+            labels = array('i', [mapping[label] for label in other.label[1:]])
+        # node i of `other` (EPSILON is not copied) is node i + offset
+        offset = len(self.label) - 1
+
+        def moved(links):
+            return array('i', [link + offset if link > 0 else link
+                               for link in links[1:]])
+        root = other.root + offset
+        self.label.extend(labels)
+        self.parent.extend(moved(other.parent))
+        self.first_child.extend(moved(other.first_child))
+        self.last_child.extend(moved(other.last_child))
+        self.next_sibling.extend(moved(other.next_sibling))
+        self.parent[root] = parent
+        if parent == self.NONE:
+            self.root = root
+        elif self.last_child[parent] == self.NONE:
+            self.first_child[parent] = self.last_child[parent] = root
+        else:
+            self.next_sibling[self.last_child[parent]] = root
+            self.last_child[parent] = root
+
+    def name(self, node: int) -> str:
+        return self.labels[self.label[node]]
+
+    def children(self, node: int):
+        """returns list of children of the node"""
+        children = []
+        child = self.first_child[node]
+        while child != self.NONE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def render(self):
+        """Generates lines of the tree
+
+        Lines are the same as `anytree.RenderTree` lines (with ContStyle). Tree
+        is walked with an explicit stack of next siblings and the prefix of
+        each depth is kept in a running prefix stack, so the prefix of a node
+        is not computed from its ancestors and deep trees can be rendered too.
+        """
+        if self.root == self.NONE:
+            return
+        labels, label = self.labels, self.label
+        first_child, next_sibling = self.first_child, self.next_sibling
+        NONE = self.NONE
+        yield labels[label[self.root]]
+        prefixes = [""]
+        stack = [first_child[self.root]]
+        while stack:
+            node = stack[-1]
+            if node == NONE:
+                stack.pop()
+                prefixes.pop()
+                continue
+            sibling = stack[-1] = next_sibling[node]
+            prefix = prefixes[-1]
+            if sibling == NONE:
+                yield f"{prefix}└── {labels[label[node]]}"
+                if first_child[node] != NONE:
+                    prefixes.append(prefix + "    ")
+                    stack.append(first_child[node])
+            else:
+                yield f"{prefix}├── {labels[label[node]]}"
+                if first_child[node] != NONE:
+                    prefixes.append(prefix + "│   ")
+                    stack.append(first_child[node])
+
+    def write(self, file, chunk_lines=4096) -> None:
+        """Writes the rendered tree into the file
+
+        Output is the same as `"\\n".join(self.render())` but lines are written
+        in chunks while the tree is walked, so the whole rendered text is never
+        kept in memory.
+        """
+        separator = ""
+        chunk = []
+        for line in self.render():
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                file.write(separator + "\n".join(chunk))
+                separator = "\n"
+                chunk.clear()
+        if chunk:
+            file.write(separator + "\n".join(chunk))
+
+    def to_anytree(self):
+        """Converts the tree to `anytree.Node`s
+
+        This adapter can be used by the code that needs anytree view of the
+        tree. Each epsilon leaf will be a separate node.
+
+        Returns:
+            anytree.Node: root of the tree (None if tree is empty)
+        """
+        from anytree import Node
+        if self.root == self.NONE:
+            return None
+        root = Node(self.name(self.root))
+        stack = [(self.root, root)]
+        while stack:
+            node, anynode = stack.pop()
+            for child in self.children(node):
+                stack.append((child, Node(self.name(child), anynode)))
+        return root
@@ -1,5 +1,5 @@
 import string
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 from enum import Enum
 from dataclasses import dataclass
 
@@ -89,15 +89,75 @@ class AutoTailState:
     callback = None
 
 
-class SymbolTable:
-    """Symbol Table"""
+"""Symbol
+
+Symbol is an interned lexim (of an ID or a keyword). An interner keeps a
+single str object for each distinct lexim, and its dense integer id is kept
+in the interner (see `Interner.id`) instead of on the symbol.
+"""
+Symbol = str
+
+
+class Interner:
+    """Interner of the lexims
+
+    Maps each distinct lexim to a single Symbol with a dense id. Keywords are
+    seeded first, so the id of a keyword is its index in KEYWORDS and a lexim
+    is a keyword iff its id is less than `len(KEYWORDS)`.
+
+    An interner can be shared by many symbol tables (e.g. all the files that a
+    batch worker compiles), so identical identifiers are stored once. It is
+    never cleared, so it should live as long as the compilation or the worker
+    that created it (there is no process-wide interner).
+    """
+    KEYWORD_COUNT = len(KEYWORDS)
 
     def __init__(self) -> None:
-        """TODO: dumb implementation of symbol table. it could be better it
-        think"""
+        self.symbols: List[Symbol] = []
+        self.ids: Dict[str, int] = {}
+        for keyword in KEYWORDS:
+            self.intern(keyword)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def id(self, lexim: str) -> int:
+        """returns the id of the lexim (it will be interned if it is new)"""
+        i = self.ids.get(lexim)
+        if i is None:
+            i = self.ids[lexim] = len(self.symbols)
+            self.symbols.append(lexim)
+        return i
+
+    def intern(self, lexim: str) -> Symbol:
+        """returns the symbol of the lexim (it will be added if it is new)"""
+        return self.symbols[self.id(lexim)]
+
+    def is_keyword(self, symbol: Symbol) -> bool:
+        i = self.ids.get(symbol)
+        return i is not None and i < self.KEYWORD_COUNT
+
+
+class SymbolTable:
+    """Symbol Table
+
+    `table` keeps the symbols of a file (keywords and the installed IDs in
+    the order of installation) mapped to their ids. Symbols are interned in
+    `interner` (a new one by default, pass the interner of the batch worker
+    to share it between files).
+
+    The scope stack (`push_scope`, `pop_scope`, `declare` and `lookup`) keeps
+    declarations of each scope in a dict keyed by symbol id, so a lookup is
+    O(1) per level.
+    """
+
+    def __init__(self, interner: Interner = None) -> None:
+        self.interner = interner if interner is not None else Interner()
         self.table = {}
         for key in sorted(KEYWORDS):
-            self.table[key] = None
+            i = self.interner.id(key)
+            self.table[self.interner.symbols[i]] = i
+        self.scopes = [{}]
 
     def dump(self):
         """dumps symbol table entries into a file
@@ -107,14 +167,73 @@ class SymbolTable:
         """
         raise NotImplementedError()
 
-    def install(self, id_key):
+    def classify(self, lexim: str) -> Tuple[TokenType, Symbol]:
+        """interns the lexim of an id/keyword and installs it if it is an ID
+
+        Returns:
+            Tuple[TokenType, Symbol]: KEYWORD or ID and symbol of the lexim
+        """
+        i = self.interner.id(lexim)
+        symbol = self.interner.symbols[i]
+        if i < Interner.KEYWORD_COUNT:
+            return TokenType.KEYWORD, symbol
+        if symbol not in self.table:
+            self.table[symbol] = i
+        return TokenType.ID, symbol
+
+    def install(self, id_key) -> Symbol:
         """insert id/keyword if it is not already in table
 
         Args:
             id_key (str): lexim of the symbol
+
+        Returns:
+            Symbol: interned symbol of the lexim
+        """
+        i = self.interner.id(id_key)
+        symbol = self.interner.symbols[i]
+        if symbol not in self.table:
+            self.table[symbol] = i
+        return symbol
+
+    def push_scope(self) -> None:
+        """starts a new (inner) scope"""
+        self.scopes.append({})
+
+    def pop_scope(self) -> dict:
+        """ends the innermost scope
+
+        Returns:
+            dict: declarations of the scope (symbol id to its attributes).
+        """
+        if len(self.scopes) == 1:
+            raise IndexError("global scope can not be popped")
+        return self.scopes.pop()
+
+    def declare(self, symbol: Symbol, attributes=None) -> None:
+        """declares the symbol in the innermost scope
+
+        Raises:
+            KeyError: if the symbol is not interned (see `install`) or it is
+                already declared in this scope.
+        """
+        scope = self.scopes[-1]
+        i = self.interner.ids.get(symbol)
+        if i is None or i in scope:
+            raise KeyError(symbol)
+        scope[i] = attributes
+
+    def lookup(self, symbol: Symbol):
+        """returns attributes of the innermost declaration of the symbol
+
+        Raises:
+            KeyError: if the symbol is not declared.
         """
-        if id_key not in self.table:
-            self.table[id_key] = None
+        i = self.interner.ids.get(symbol)  # None is never declared
+        for scope in reversed(self.scopes):
+            if i in scope:
+                return scope[i]
+        raise KeyError(symbol)
 
 
 class classproperty(property):
@@ -0,0 +1,126 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from batch import (compile_batch, compile_text, find_sources, summary,
+                   PARSERS, SCANNERS)
+from cache import OUTPUTS as FILES
+from cparser import StoreParser, TABLE
+from scanner import Scanner
+from util.buffer import AllBuffer
+
+TEST_PATH = Path(__file__).parent
+OUTPUTS = {'PA1_testcases': ['tokens.txt', 'symbol_table.txt',
+                             'lexical_errors.txt'],
+           'PA2_testcases': ['parse_tree.txt', 'syntax_errors.txt']}
+
+
+def tokenized(text):
+    """outputs of tokenizing the whole text before it is parsed (see
+    `Scanner.tokenize`)"""
+    scanner = Scanner(AllBuffer(fake=text))
+    outputs = {name: io.StringIO() for name in FILES}
+    parser = StoreParser(scanner.tokenize(TABLE.terminal_id),
+                         outputs['syntax_errors.txt'],
+                         outputs['parse_tree.txt'])
+    parser.parse()
+    scanner.dump_log(file_tokens=outputs['tokens.txt'],
+                     file_errors=outputs['lexical_errors.txt'],
+                     file_symbols=outputs['symbol_table.txt'])
+    return tuple(outputs[name].getvalue() for name in FILES)
+
+
+class BatchTest(unittest.TestCase):
+    def test_find_sources(self):
+        sources = find_sources([TEST_PATH.joinpath('PA1_testcases'),
+                                TEST_PATH.joinpath('input.txt')])
+        self.assertEqual(len(sources), 11)
+        self.assertEqual(sources[0][1], str(Path('PA1_testcases/T01/input')))
+        self.assertEqual(sources[-1][1], 'input')
+
+    def test_compile_batch(self):
+        """outputs of each file should be same as the test cases"""
+        with tempfile.TemporaryDirectory() as output:
+            paths = [TEST_PATH.joinpath(name) for name in OUTPUTS]
+            results = compile_batch(paths, output, jobs=2)
+            self.assertEqual(len(results), 20)
+            self.assertFalse([r.error for r in results if r.error])
+            for name, files in OUTPUTS.items():
+                for test in TEST_PATH.joinpath(name).iterdir():
+                    out = Path(output, name, test.name, 'input')
+                    for file in files:
+                        with self.subTest(test=test.name, file=file):
+                            self.assertEqual(
+                                out.joinpath(file).read_text('utf-8'),
+                                test.joinpath(file).read_text('utf-8'))
+            self.assertIn("20 files compiled (0 failed)", summary(results))
+
+    def test_eof_character(self):
+        """scanning should stop at an EOF character like a sequential scan"""
+        texts = ["int a;\x05 int b; @", "int a; } int b;\x05 c @ d;\n",
+                 "void main(void) { a = 1;\x05", "\x05int a;", "int a; \x05"]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(compile_text(text).outputs, tokenized(text))
+
+    def test_early_stop(self):
+        """scanner outputs should not depend on the tokens that the parser
+        lexed ahead before it stopped"""
+        text = "int a; } int b; @ c;\n"
+        expected = tokenized(text)
+        self.assertIn("(ID, c)", expected[0])
+        self.assertEqual(compile_text(text).outputs, expected)
+        # tokens are lexed one by one if there is a budget
+        self.assertEqual(compile_text(text, max_errors=10).outputs, expected)
+
+    def test_engines(self):
+        """every scanner and parser should make the same outputs"""
+        texts = [path.read_text() for name in OUTPUTS
+                 for path in TEST_PATH.joinpath(name).glob('*/input.txt')]
+        texts.append("int a; } int b; @ c;\n")
+        for text in texts:
+            expected = compile_text(text).outputs
+            for scanner in SCANNERS:
+                for parser in PARSERS:
+                    with self.subTest(text=text[:20], scanner=scanner,
+                                      parser=parser):
+                        entry = compile_text(text, scanner_kind=scanner,
+                                             parser_kind=parser)
+                        self.assertEqual(entry.outputs, expected)
+        with tempfile.TemporaryDirectory() as output:
+            for jobs in (1, 2):
+                results = compile_batch([TEST_PATH.joinpath('PA2_testcases')],
+                                        Path(output, str(jobs)), jobs,
+                                        scanner_kind='generated',
+                                        parser_kind='generated')
+                self.assertFalse([r.error for r in results if r.error])
+                for result in results:
+                    expected = Path(result.source).with_name('parse_tree.txt')
+                    with self.subTest(jobs=jobs, source=result.source):
+                        self.assertEqual(
+                            Path(result.output, 'parse_tree.txt')
+                            .read_text('utf-8'),
+                            expected.read_text('utf-8'))
+
+    def test_missing_file(self):
+        with tempfile.TemporaryDirectory() as output:
+            results = compile_batch([Path(output, 'missing.txt')], output)
+            self.assertTrue(results[0].error.startswith("FileNotFoundError"))
+
+    def test_error_budget(self):
+        text = "int a; @ 3d\nvoid main(void) { a = ; } ] ]\n" * 20
+        full = compile_text(text)
+        self.assertEqual((full.lexical_errors, full.syntax_errors), (40, 60))
+        entry = compile_text(text, max_errors=5)
+        self.assertEqual((entry.lexical_errors, entry.syntax_errors), (40, 60))
+        self.assertEqual(entry.outputs[0], full.outputs[0])  # tokens.txt
+        # the budget is shared by lexical and syntax errors
+        self.assertEqual(entry.outputs[1].count("("), 2)
+        self.assertEqual(entry.outputs[3].count("\n"), 3)
+        first = compile_text("@ int a;", max_errors=0, stop=True)
+        self.assertEqual((first.lexical_errors, first.syntax_errors), (1, 0))
+        self.assertEqual(first.outputs[3], "")  # syntax_errors.txt
+        stopped = compile_text(text, max_errors=5, stop=True)
+        self.assertLess(len(stopped.outputs[0]), len(full.outputs[0]))
+        self.assertEqual(stopped.outputs[1], entry.outputs[1])
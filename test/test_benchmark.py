@@ -0,0 +1,35 @@
+import unittest
+
+from benchmark import Generator, compare, run
+from batch import compile_text
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_generated_programs_are_valid(self):
+        generator = Generator()
+        for text in [generator.program(5000), generator.nested(50),
+                     generator.comments(5000)]:
+            entry = compile_text(text)
+            self.assertEqual((entry.lexical_errors, entry.syntax_errors),
+                             (0, 0))
+        entry = compile_text(generator.errors(5000))
+        self.assertTrue(entry.lexical_errors and entry.syntax_errors)
+
+    def test_run(self):
+        results = run(scale=0.01, repeat=1, e2e=False, names=['small'])
+        metrics = results['results']['small']
+        self.assertGreater(metrics['tokens_per_second'], 0)
+        self.assertGreater(metrics['nodes_per_second'], 0)
+        self.assertGreater(metrics['peak_memory'], 0)
+        self.assertNotIn('latency', metrics)
+
+    def test_compare(self):
+        baseline = {'scale': 1, 'results': {'small': {
+            'tokens_per_second': 100, 'peak_memory': 100, 'latency': 1}}}
+        current = {'scale': 1, 'results': {'small': {
+            'tokens_per_second': 95, 'peak_memory': 120, 'latency': 0.5}}}
+        self.assertEqual(compare(current, baseline, 10),
+                         ["small.peak_memory: 100 -> 120 (+20.0%)"])
+        self.assertEqual(len(compare(current, baseline, 4)), 2)
+        with self.assertRaises(ValueError):
+            compare(dict(current, scale=2), baseline)
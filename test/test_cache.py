@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from batch import compile_batch
+from cache import Cache, Entry
+
+TEST_PATH = Path(__file__).parent
+
+
+class CacheTest(unittest.TestCase):
+    def test_entry(self):
+        entry = Entry(("a", "", "ü", "#1 : syntax error", "Program"), 3, 1, 2)
+        self.assertEqual(Entry.from_bytes(entry.to_bytes()), entry)
+        with self.assertRaises(ValueError):
+            Entry.from_bytes(entry.to_bytes()[:-1])
+
+    def test_get_put(self):
+        with tempfile.TemporaryDirectory() as path:
+            cache = Cache(path)
+            key = cache.key(b"int a;")
+            self.assertNotEqual(key, cache.key(b"int b;"))
+            self.assertIsNone(cache.get(key))
+            entry = Entry(("",) * 5, 1)
+            cache.put(key, entry)
+            self.assertEqual(cache.get(key), entry)
+            cache.file(key).write_bytes(b"corrupted")
+            self.assertIsNone(cache.get(key))
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as path:
+            cache = Cache(path)
+            keys = [cache.key(bytes([i])) for i in range(4)]
+            for i, key in enumerate(keys):
+                cache.put(key, Entry((str(i) * 1000,) * 5))
+                os.utime(cache.file(key), (i, i))
+            cache.get(keys[0])  # most recently used
+            size = cache.file(keys[0]).stat().st_size
+            cache.max_size = size * 2
+            self.assertEqual(cache.evict(), 2)
+            self.assertIsNotNone(cache.get(keys[0]))
+            self.assertIsNotNone(cache.get(keys[3]))
+            self.assertIsNone(cache.get(keys[1]))
+            self.assertIsNone(cache.get(keys[2]))
+
+    def test_compile_batch(self):
+        """second batch should be read from the cache with the same outputs"""
+        with tempfile.TemporaryDirectory() as path:
+            cache = Cache(Path(path, 'cache'))
+            paths = [TEST_PATH.joinpath('PA2_testcases')]
+            results = compile_batch(paths, Path(path, 'a'), 2, cache=cache)
+            self.assertFalse([r for r in results if r.error or r.cached])
+            cached = compile_batch(paths, Path(path, 'b'), 2, cache=cache)
+            self.assertTrue(all(r.cached for r in cached))
+            self.assertEqual([(r.tokens, r.syntax_errors) for r in results],
+                             [(r.tokens, r.syntax_errors) for r in cached])
+            for file in Path(path, 'a').rglob('*.txt'):
+                with self.subTest(file=file.name):
+                    self.assertEqual(
+                        file.read_text('utf-8'),
+                        Path(path, 'b', file.relative_to(Path(path, 'a')))
+                        .read_text('utf-8'))
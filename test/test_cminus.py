@@ -2,6 +2,7 @@ import unittest
 
 from util.buffer import AllBuffer
 from util.cminus import CMinus
+from util.scangen import get_generated_language
 from util.types_ import TokenType
 
 
@@ -120,3 +121,21 @@ class CMinusTest(unittest.TestCase):
         buf = AllBuffer(fake="/*** com*m\nen/t *\n** *\n*")
         self.assertRaises(ValueError, self.dfa, buf)
         self.assertEqual(buf(), '\x05')
+
+
+class CompiledCMinusTest(CMinusTest):
+    """Same cases as `CMinusTest` but with the table driven dfa"""
+
+    def setUp(self) -> None:
+        self.dfa = CMinus.get_compiled_language()
+
+    def test_non_ascii(self):
+        buf = AllBuffer(fake="é")
+        self.assertRaises(ValueError, self.dfa, buf)
+
+
+class GeneratedCMinusTest(CMinusTest):
+    """Same cases as `CMinusTest` but with the generated scanner module"""
+
+    def setUp(self) -> None:
+        self.dfa = get_generated_language()
@@ -0,0 +1,166 @@
+import os
+import subprocess
+import sys
+import unittest
+from io import StringIO
+from pathlib import Path
+
+from cparser import TABLE, Transition, Parser, StoreParser, GeneratedParser
+from scanner import Scanner
+from util.buffer import AllBuffer
+from util.cminus import GRAMMAR
+from util.logger import ErrorBudget
+from util.types_ import TokenType
+
+
+class PredictTableTest(unittest.TestCase):
+    def test_same_as_transitions(self):
+        """predict table should select the same rules as `get_rule`"""
+        for name, diagram in GRAMMAR.items():
+            trans = Transition(diagram)
+            nt = TABLE.nonterminal_ids[name]
+            for terminal, tid in TABLE.terminal_ids.items():
+                rule = trans.get_rule(terminal)
+                rule_id = TABLE.predict[nt][tid]
+                if rule is None:
+                    self.assertEqual(rule_id, TABLE.NO_RULE)
+                else:
+                    edges = [TABLE.nonterminals[i] if is_nt
+                             else TABLE.terminals[i]
+                             for is_nt, i in TABLE.rules[rule_id]]
+                    self.assertEqual(edges, [e for e in rule.rule if e])
+
+    def test_sync(self):
+        for nt in range(len(TABLE.nonterminals)):
+            for tid in range(TABLE.UNKNOWN + 1):
+                self.assertEqual(
+                    TABLE.sync[nt][tid],
+                    TABLE.predict[nt][tid] != TABLE.NO_RULE
+                    or tid in TABLE.follow[nt] or tid == TABLE.DOLOR)
+
+    def test_terminal_id(self):
+        self.assertEqual(TABLE.terminal_id(TokenType.ID, "a"),
+                         TABLE.terminal_ids["ID"])
+        self.assertEqual(TABLE.terminal_id(TokenType.KEYWORD, "int"),
+                         TABLE.terminal_ids["int"])
+        self.assertEqual(TABLE.terminal_id(TokenType.SYMBOL, ":"),
+                         TABLE.UNKNOWN)
+
+    def test_hash_seed(self):
+        """ids should be the same in all processes (see `parsegen`)"""
+        code = ("from cparser import TABLE; "
+                "print(TABLE.terminals, TABLE.nonterminals)")
+        src = Path(__file__).parents[1].joinpath('src')
+        outputs = {subprocess.run(
+            [sys.executable, '-c', code], cwd=src, capture_output=True,
+            text=True, env={**os.environ, 'PYTHONHASHSEED': str(seed)}).stdout
+            for seed in range(3)}
+        self.assertEqual(outputs,
+                         {f"{TABLE.terminals} {TABLE.nonterminals}\n"})
+
+
+class ParserTest(unittest.TestCase):
+    parser_class = Parser
+
+    def parse(self, text, budget=None):
+        tree, err = StringIO(), StringIO()
+        parser = self.parser_class(Scanner(buffer=AllBuffer(fake=text)), err,
+                                   tree, budget)
+        parser.parse()
+        return tree.getvalue(), err.getvalue()
+
+    def test_deep_nesting(self):
+        """parser should not be limited by the recursion limit"""
+        depth = sys.getrecursionlimit() // 4  # each level is 5 nonterminals
+        text = "void main(void){ x = " + "(" * depth + "1" + ")" * depth + ";}"
+        tree, err = self.parse(text)
+        self.assertEqual(err, "There is no syntax error.")
+        self.assertTrue(tree.endswith("└── $"))
+        self.assertEqual(tree.count("(SYMBOL, ()"), depth + 1)
+
+    def test_peek(self):
+        text = "int a; void main(void) { }"
+        parser = Parser(Scanner(buffer=AllBuffer(fake=text)),
+                        StringIO(), StringIO())
+        parser.block_size = 2
+        parser.step_lookahead()
+        self.assertEqual(parser.peek()[1], "a")
+        self.assertEqual(parser.peek(3)[1], "void")
+        self.assertEqual(parser.peek(20)[0], TokenType.DOLOR)
+        parser.step_lookahead()
+        self.assertEqual(parser.lookahead[1], "a")
+        self.assertEqual(parser.peek(2)[1], "void")
+
+    def test_error_budget(self):
+        text = "void main(void) { " + "a = ] ) ; " * 100 + "}\nint a;"
+        tree, err = self.parse(text)
+        self.assertEqual(err.count("\n"), 400)
+        budget = ErrorBudget(10)
+        self.assertEqual(self.parse(text, budget),
+                         (tree, "".join(err.splitlines(True)[:10])))
+        self.assertEqual(budget.count, 400)
+        budget = ErrorBudget(10, stop=True)
+        stopped, errors = self.parse(text, budget)
+        self.assertEqual(errors, "".join(err.splitlines(True)[:10]))
+        self.assertFalse(stopped.endswith("└── $"))
+        self.assertEqual(budget.count, 11)
+
+    def test_error_budget_first_token(self):
+        """budget spent by a lexical error of the first lookahead"""
+        budget = ErrorBudget(0, stop=True)
+        scanner = Scanner(buffer=AllBuffer(fake="@ int a;"))
+        scanner.logger.budget = budget
+        tree, err = StringIO(), StringIO()
+        self.parser_class(scanner, err, tree, budget).parse()
+        self.assertEqual((tree.getvalue(), err.getvalue()), ("", ""))
+        self.assertTrue(budget.stopped)
+
+
+class GeneratedParserTest(ParserTest):
+    """Same cases as `ParserTest` but with the generated parser module"""
+    parser_class = GeneratedParser
+
+    def test_same_as_parser(self):
+        texts = [p.read_text() for p in Path(__file__).parent
+                 .glob('PA2_testcases/*/input.txt')]
+        texts += ["void main(void) { a = ] ) ; }", "int a[; void", "int",
+                  "void f(int x[], void) { if (a) b; else { } repeat c; "
+                  "until (d == 1) return ; break; }", "} } int a;",
+                  "int f(void) { x = a[1] * f(2, b < -3) + (4); }"]
+        for i, text in enumerate(texts):
+            with self.subTest(input=i):
+                self.parser_class = Parser
+                expected = self.parse(text)
+                self.parser_class = GeneratedParser
+                self.assertEqual(self.parse(text), expected)
+
+
+class StoreParserTest(unittest.TestCase):
+    def test_same_as_parser(self):
+        test_path = Path(__file__).parent.joinpath('PA2_testcases')
+        for test in test_path.iterdir():
+            with self.subTest(test=test.name):
+                text = test.joinpath('input.txt').read_text()
+                scanner = Scanner(buffer=AllBuffer(fake=text))
+                tokens = scanner.tokenize(TABLE.terminal_id)
+                tree, err = StringIO(), StringIO()
+                StoreParser(tokens, err, tree).parse()
+                self.assertEqual(tree.getvalue(),
+                                 test.joinpath('parse_tree.txt')
+                                 .read_text('utf-8'))
+                self.assertEqual(err.getvalue(),
+                                 test.joinpath('syntax_errors.txt')
+                                 .read_text())
+
+    def test_tokenize(self):
+        text = "void main(void) { a[2] = b * 12; /* c */ }\nint x; @ 3d"
+        tokens = Scanner(buffer=AllBuffer(fake=text)) \
+            .tokenize(TABLE.terminal_id)
+        expected = list(Scanner(buffer=AllBuffer(fake=text)).iterator)
+        self.assertEqual([tokens[i] for i in range(len(tokens))], expected)
+        self.assertEqual(list(tokens.tids),
+                         [TABLE.terminal_id(tt, lexim)
+                          for tt, lexim, _ in expected])
+        tuples = sum(sys.getsizeof(token) + sys.getsizeof(token[1])
+                     for token in expected)
+        self.assertLess(tokens.nbytes() * 4, tuples)
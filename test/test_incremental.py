@@ -0,0 +1,119 @@
+import io
+import random
+import unittest
+from pathlib import Path
+
+from cparser import Parser
+from incremental import IncrementalScanner, IncrementalParser
+from scanner import Scanner
+from util.buffer import AllBuffer
+
+TEST_PATH = Path(__file__).parent
+
+
+class IncrementalScannerTest(unittest.TestCase):
+    def assertSameAsFullScan(self, scanner):
+        full = IncrementalScanner(scanner.text)
+        self.assertEqual(scanner.types, full.types)
+        self.assertEqual(scanner.lexims, full.lexims)
+        self.assertEqual(scanner.linenos, full.linenos)
+        self.assertEqual(scanner.starts, full.starts)
+        self.assertEqual(scanner.checkpoints, full.checkpoints)
+        self.assertEqual(scanner.logger.tokens, full.logger.tokens)
+        self.assertEqual(scanner.logger.errors, full.logger.errors)
+        self.assertEqual(list(scanner.symbol_table.table),
+                         list(full.symbol_table.table))
+
+    def test_edit_inside_line(self):
+        text = "int a;\nint b;\nvoid main(void) {\n a = b;\n}\n" * 20
+        scanner = IncrementalScanner(text)
+        offset = text.index("a = b")
+        scanner.edit(offset, offset + 1, "abc")
+        self.assertSameAsFullScan(scanner)
+        self.assertLess(scanner.rescanned, 10)
+
+    def test_bounded_edit(self):
+        """an edit should only scan a window and rebuild the chunks around
+        it (other chunks are only moved)"""
+        text = "int a;\nint b;\nvoid main(void) {\n a = b;\n}\n" * 500
+        scanner = IncrementalScanner(text)
+        chunks = list(scanner.chunks)
+        offset = text.index("a = b", len(text) // 2)
+        scanner.edit(offset, offset + 1, "abc\n")
+        self.assertSameAsFullScan(scanner)
+        self.assertLessEqual(scanner.touched, 2 * IncrementalScanner.CHUNK)
+        self.assertLessEqual(len(scanner.buf.file), IncrementalScanner.WINDOW
+                             + 10)
+        kept = set(map(id, chunks)) & set(map(id, scanner.chunks))
+        self.assertGreaterEqual(len(kept), len(chunks) - 2)
+
+    def test_merge_tokens(self):
+        scanner = IncrementalScanner("int a;\nint b c;")
+        scanner.edit(12, 13, "")  # "int bc;"
+        self.assertSameAsFullScan(scanner)
+        self.assertIn("bc", scanner.symbol_table.table)
+        self.assertNotIn("b", scanner.symbol_table.table)
+
+    def test_open_and_close_comment(self):
+        scanner = IncrementalScanner("int a;\nint b;\nint c;\n")
+        scanner.edit(7, 7, "/*")
+        self.assertSameAsFullScan(scanner)
+        scanner.edit(16, 16, "*/")
+        self.assertSameAsFullScan(scanner)
+        self.assertEqual(scanner.text, "int a;\n/*int b;\n*/int c;\n")
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        alphabet = list("ab1 \n;(){}=*/@") + ["/*", "*/", "int", "\n\n"]
+        for test in TEST_PATH.joinpath('PA1_testcases').iterdir():
+            scanner = IncrementalScanner(
+                test.joinpath('input.txt').read_text())
+            for _ in range(10):
+                start = rng.randint(0, len(scanner.text))
+                end = min(len(scanner.text), start + rng.randint(0, 3))
+                text = "".join(rng.choices(alphabet, k=rng.randint(0, 3)))
+                with self.subTest(test=test.name, edit=(start, end, text)):
+                    scanner.edit(start, end, text)
+                    self.assertSameAsFullScan(scanner)
+
+
+class IncrementalParserTest(unittest.TestCase):
+    def full_parse(self, text):
+        err, tree = io.StringIO(), io.StringIO()
+        Parser(Scanner(AllBuffer(fake=text)), err, tree).parse()
+        return err.getvalue(), tree.getvalue()
+
+    def incremental_parse(self, parser, scanner):
+        err, tree = io.StringIO(), io.StringIO()
+        parser.parse(scanner.tokens(), err, tree)
+        return err.getvalue(), tree.getvalue()
+
+    def test_reuse_declarations(self):
+        text = "int a;\nint f(int x) {\n return x;\n}\n" * 10
+        scanner = IncrementalScanner(text)
+        parser = IncrementalParser(io.StringIO(), io.StringIO())
+        self.assertEqual(self.incremental_parse(parser, scanner),
+                         self.full_parse(scanner.text))
+        self.assertEqual(parser.reused, 0)
+        offset = text.index("return x")
+        scanner.edit(offset + 7, offset + 8, "x +")  # syntax error
+        self.assertEqual(self.incremental_parse(parser, scanner),
+                         self.full_parse(scanner.text))
+        self.assertEqual(parser.reused, 19)
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        alphabet = list("ab1 \n;(){}[]=+<*") + ["int ", "void ", "if", "\n\n"]
+        for test in TEST_PATH.joinpath('PA2_testcases').iterdir():
+            scanner = IncrementalScanner(
+                test.joinpath('input.txt').read_text())
+            parser = IncrementalParser(io.StringIO(), io.StringIO())
+            self.incremental_parse(parser, scanner)
+            for _ in range(10):
+                start = rng.randint(0, len(scanner.text))
+                end = min(len(scanner.text), start + rng.randint(0, 3))
+                text = "".join(rng.choices(alphabet, k=rng.randint(0, 3)))
+                with self.subTest(test=test.name, edit=(start, end, text)):
+                    scanner.edit(start, end, text)
+                    self.assertEqual(self.incremental_parse(parser, scanner),
+                                     self.full_parse(scanner.text))
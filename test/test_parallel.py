@@ -0,0 +1,113 @@
+import io
+import unittest
+from pathlib import Path
+
+from cparser import Parser
+from parallel import (ParallelParser, ParallelScanner, boundaries,
+                      declaration_starts)
+from scanner import Scanner
+from util.buffer import AllBuffer
+
+TEST_PATH = Path(__file__).parent
+
+
+def logs(scanner):
+    files = [io.StringIO() for _ in range(3)]
+    scanner.dump_log(*files)
+    return [file.getvalue() for file in files]
+
+
+class ParallelScannerTest(unittest.TestCase):
+    def assertSameAsSequential(self, text, scanner):
+        sequential = Scanner(AllBuffer(fake=text))
+        tokens = list(sequential.iterator)
+        self.assertEqual(list(scanner.iterator), tokens)
+        self.assertEqual(logs(scanner), logs(sequential))
+        self.assertEqual(list(scanner.symbol_table.table),
+                         list(sequential.symbol_table.table))
+
+    def test_testcases(self):
+        for name in ['PA1_testcases', 'PA2_testcases']:
+            for test in TEST_PATH.joinpath(name).iterdir():
+                text = test.joinpath('input.txt').read_text()
+                for jobs in (1, 2):
+                    with self.subTest(test=test.name, jobs=jobs):
+                        self.assertSameAsSequential(text, ParallelScanner(
+                            text, jobs=jobs, min_chunk=32))
+
+    def test_boundaries(self):
+        text = "int a;\n/* b\n c */\nint c;\n/* unclosed\n d\n"
+        for chunks in range(1, 8):
+            points = boundaries(text, chunks)
+            self.assertEqual(points[0], 0)
+            self.assertEqual(points[-1], len(text) + 1)
+            for point in points[1:-1]:
+                self.assertEqual(text[point], '\n')
+                self.assertNotIn(point, range(7, 16))
+                self.assertLessEqual(point, 24)
+
+    def test_desynchronized(self):
+        """boundaries in tokens (e.g. comments that the regex pass does not
+        see as the scanner does) should be lexed again"""
+        texts = ["*/*/\n*!\t**/ =*/\n;/**(*/\n1!@1=!\n/**/**/*/1\t/**@ }@in",
+                 "a = 1;\n/*/ b\n*/ c = 2;\n/**\n/*/ d;\n",
+                 "x\n/*\n*/*/\ny = 12ab;\n@\n/*\n\x05 z\n",
+                 "\n!*\x05\n*\t@\x05", "@@/*\n/*a@\n*/=1/*\n11"]
+        for text in texts:
+            for min_chunk in range(1, 30):
+                with self.subTest(text=text, min_chunk=min_chunk):
+                    self.assertSameAsSequential(text, ParallelScanner(
+                        text, jobs=2, min_chunk=min_chunk))
+
+
+class ParallelParserTest(unittest.TestCase):
+    def full_parse(self, text):
+        err, tree = io.StringIO(), io.StringIO()
+        Parser(Scanner(AllBuffer(fake=text)), err, tree).parse()
+        return err.getvalue(), tree.getvalue()
+
+    def parallel_parse(self, parser, text):
+        err, tree = io.StringIO(), io.StringIO()
+        parser.parse(list(Scanner(AllBuffer(fake=text)).iterator), err, tree)
+        return err.getvalue(), tree.getvalue()
+
+    def test_testcases(self):
+        for test in TEST_PATH.joinpath('PA2_testcases').iterdir():
+            text = test.joinpath('input.txt').read_text()
+            for jobs in (1, 2):
+                with self.subTest(test=test.name, jobs=jobs):
+                    parser = ParallelParser(io.StringIO(), io.StringIO(),
+                                            jobs, min_declarations=1)
+                    self.assertEqual(self.parallel_parse(parser, text),
+                                     self.full_parse(text))
+
+    def test_declaration_starts(self):
+        text = ("int a;\nvoid f(void) {\n int b;\n { int c; }\n}\n"
+                "int g[2];\nint h(int x[]) { return x; }\n")
+        tokens = list(Scanner(AllBuffer(fake=text)).iterator)
+        self.assertEqual([tokens[i][1:] for i in declaration_starts(tokens)],
+                         [('int', 1), ('void', 2), ('int', 6), ('int', 7)])
+
+    def test_sequential(self):
+        """a single job (or too few declarations) should not pre-parse"""
+        texts = ["", "   \n", "a = 1;", "} } ;", "int a;"]
+        for text in texts:
+            for jobs in (1, 2):
+                with self.subTest(text=text, jobs=jobs):
+                    parser = ParallelParser(io.StringIO(), io.StringIO(),
+                                            jobs)
+                    self.assertEqual(self.parallel_parse(parser, text),
+                                     self.full_parse(text))
+                    self.assertEqual(parser.reused, 0)
+
+    def test_reuse(self):
+        text = "int a;\nint f(int x) {\n return x;\n}\n" * 10
+        parser = ParallelParser(io.StringIO(), io.StringIO(), 2,
+                                min_declarations=1)
+        self.assertEqual(self.parallel_parse(parser, text),
+                         self.full_parse(text))
+        self.assertEqual(parser.reused, 20)
+        # "int f" is not a start after the missing ';'
+        text = text.replace(";", "", 1)
+        self.assertEqual(self.parallel_parse(parser, text),
+                         self.full_parse(text))
@@ -0,0 +1,20 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import parsegen
+from cparser import TABLE
+
+
+class ParsegenTest(unittest.TestCase):
+    def test_rebuild_when_stale(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'cminus_parser.py')
+            parsegen.load(TABLE, path)
+            source = path.read_text()
+            # e.g. the grammar changed
+            path.write_text(source.replace(parsegen.fingerprint(TABLE),
+                                           "0" * 64))
+            module = parsegen.load(TABLE, path)
+            self.assertEqual(path.read_text(), source)
+            self.assertTrue(callable(module.make))
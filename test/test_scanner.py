@@ -1,9 +1,13 @@
 import unittest
+from pathlib import Path
 
 from util.buffer import AllBuffer
-from scanner import Scanner
+from util.cminus import CMinus
+from scanner import Scanner, RegexScanner, GeneratedScanner
 from util.types_ import TokenType, ErrorType
 
+TEST_PATH = Path(__file__).parent
+
 
 class GetTokenTest(unittest.TestCase):
     def test_simple_tokens(self):
@@ -46,3 +50,86 @@ class GetTokenTest(unittest.TestCase):
             tt, lexim = scanner.get_token()
             self.assertEqual(expected_type, tt)
             self.assertEqual(expected_lexim, lexim)
+
+    def test_keywords(self):
+        """dfas match keywords as IDs, the scanner tells them apart"""
+        text = "void voids int0 repea"
+        expected = [TokenType.KEYWORD] + [TokenType.ID] * 3
+        for scanner_class in (Scanner, RegexScanner, GeneratedScanner):
+            with self.subTest(scanner=scanner_class.__name__):
+                scanner = scanner_class(buffer=AllBuffer(fake=text))
+                types = [scanner.get_next_token()[0] for _ in expected]
+                self.assertEqual(types, expected)
+                self.assertEqual(list(scanner.symbol_table.table)[-3:],
+                                 ["voids", "int0", "repea"])
+
+
+class EngineTest(unittest.TestCase):
+    def tokens(self, text, dfa=None):
+        scanner = Scanner(buffer=AllBuffer(fake=text), dfa=dfa)
+        tokens = []
+        while not tokens or tokens[-1][0] != TokenType.DOLOR:
+            tokens.append(scanner.get_token())
+        return tokens
+
+    def test_compiled_matches_reference(self):
+        """compiled dfa should return exactly what reference dfa returns"""
+        inputs = ["int a=22;", "\t\tcd!e=7;\n\t}", "/* x */ *//x ==@3a é",
+                  "voi void voids /* unclosed"]
+        inputs += [p.read_text() for p in TEST_PATH.glob('PA*/*/input.txt')]
+        for i, text in enumerate(inputs):
+            with self.subTest(input=i):
+                self.assertEqual(self.tokens(text, CMinus.get_language()),
+                                 self.tokens(text))
+
+    def test_regex_matches_reference(self):
+        inputs = ["int a=22;", "\t\tcd!e=7;\n\t}", "/* x */ *//x ==@3a é",
+                  "voi void voids /* unclosed", "", "a\x05b", "=*/**/"]
+        for i, text in enumerate(inputs):
+            with self.subTest(input=i):
+                ref = Scanner(buffer=AllBuffer(fake=text))
+                regex = RegexScanner(buffer=AllBuffer(fake=text))
+                for _ in range(len(text) + 1):
+                    self.assertEqual(ref.get_next_token(),
+                                     regex.get_next_token())
+                self.assertEqual(ref.logger.errors, regex.logger.errors)
+
+    def test_generated_matches_reference(self):
+        inputs = ["int a=22;", "\t\tcd!e=7;\n\t}", "/* x */ *//x ==@3a é",
+                  "voi void voids /* unclosed", "", "a\x05b", "=*/**/",
+                  "12ab 3 a3", "a==b=c; 2"]
+        inputs += [p.read_text() for p in TEST_PATH.glob('PA*/*/input.txt')]
+        for i, text in enumerate(inputs):
+            with self.subTest(input=i):
+                ref = Scanner(buffer=AllBuffer(fake=text),
+                              dfa=CMinus.get_language())
+                generated = GeneratedScanner(buffer=AllBuffer(fake=text))
+                self.assertEqual(list(generated.iterator), list(ref.iterator))
+                self.assertEqual(ref.logger.errors, generated.logger.errors)
+
+
+class NextTokensTest(unittest.TestCase):
+    def test_same_as_get_next_token(self):
+        """blocks should be the tokens (and logs) of `get_next_token`"""
+        for test in TEST_PATH.glob('PA*/*/input.txt'):
+            text = test.read_text()
+            for n in (1, 3, 256):
+                with self.subTest(test=test.parent.name, n=n):
+                    one = Scanner(buffer=AllBuffer(fake=text))
+                    block = Scanner(buffer=AllBuffer(fake=text))
+                    tokens = list(one.iterator)
+                    blocks = []
+                    while not blocks or blocks[-1][0] != TokenType.DOLOR:
+                        blocks.extend(block.next_tokens(n))
+                    self.assertEqual(blocks, tokens)
+                    self.assertEqual(block.logger.tokens, one.logger.tokens)
+                    self.assertEqual(block.logger.errors, one.logger.errors)
+
+    def test_block_ends_at_eof(self):
+        scanner = Scanner(buffer=AllBuffer(fake="a b @ c"))
+        self.assertEqual([token[1] for token in scanner.next_tokens(2)],
+                         ["a", "b"])
+        self.assertEqual(scanner.next_tokens(10),
+                         [(TokenType.ID, "c", 1), (TokenType.DOLOR, "", 1)])
+        self.assertEqual(scanner.logger.errors,
+                         {1: [("@", ErrorType.INVALID_INPUT)]})
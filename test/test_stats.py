@@ -0,0 +1,72 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from batch import compile_batch, compile_text, summary
+from cparser import TABLE
+from scanner import Scanner
+from stats import Stats, StatsParser, compile_stats
+from util.buffer import AllBuffer
+
+TEST_PATH = Path(__file__).parent
+
+
+class StatsTest(unittest.TestCase):
+    def test_same_outputs(self):
+        """outputs should be the same as compiling without statistics"""
+        for name in ['PA1_testcases', 'PA2_testcases']:
+            for test in TEST_PATH.joinpath(name).iterdir():
+                with self.subTest(test=test.name):
+                    text = test.joinpath('input.txt').read_text()
+                    entry, _ = compile_stats(text)
+                    self.assertEqual(entry, compile_text(text))
+
+    def test_counters(self):
+        text = "int a;\nvoid main(void) {\n a = 3d + @;\n}\n"
+        entry, stats = compile_stats(text)
+        self.assertEqual(set(stats.phases), {'scan', 'parse', 'tree', 'log'})
+        self.assertEqual(stats.characters, len(text))
+        self.assertEqual(stats.tokens, {'KEYWORD': 3, 'ID': 3, 'SYMBOL': 8})
+        self.assertEqual(stats.lexical_errors,
+                         {'Invalid number': 1, 'Invalid input': 1})
+        self.assertEqual(stats.syntax_errors, {'missing': 1, 'illegal': 1})
+        self.assertEqual(stats.expansions['Declaration'], 2)
+        self.assertEqual(stats.expansions['Program'], 1)
+        self.assertGreater(stats.max_depth, 10)
+        self.assertEqual(stats.bytes_written['syntax_errors.txt'],
+                         len(entry.outputs[3]))
+
+    def test_max_depth(self):
+        """depth measured by the transit should be the depth of the deepest
+        nonterminal of the tree"""
+        texts = ["", "int a;", "void main(void) { if (a) { b = (c + 1); } }",
+                 "int a; } void f(int x[]) { repeat { break; } until (x) }"]
+        for text in texts:
+            with self.subTest(text=text):
+                parser = StatsParser(Scanner(AllBuffer(fake=text)),
+                                     io.StringIO(), io.StringIO())
+                parser.parse()
+                tree = parser.parse_tree
+                depth, deepest = [0] * len(tree), 0
+                for node in range(1, len(tree)):
+                    if tree.parent[node] != tree.NONE:
+                        depth[node] = depth[tree.parent[node]] + 1
+                    if tree.labels[tree.label[node]] in TABLE.nonterminals:
+                        deepest = max(deepest, depth[node])
+                self.assertEqual(parser.max_depth, deepest)
+
+    def test_merge(self):
+        _, a = compile_stats("int a;")
+        _, b = compile_stats("int b; int c[2];")
+        merged = Stats().merge(a).merge(b)
+        self.assertEqual(merged.characters, 22)
+        self.assertEqual(merged.expansions['Declaration'], 3)
+        self.assertEqual(merged.max_depth, max(a.max_depth, b.max_depth))
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as output:
+            results = compile_batch([TEST_PATH.joinpath('PA2_testcases')],
+                                    output, jobs=2, stats=True)
+        self.assertTrue(all(r.stats for r in results))
+        self.assertIn("expansions (top 10):", summary(results))
@@ -2,8 +2,10 @@ import unittest
 from pathlib import Path
 from io import StringIO
 
-from scanner import Scanner
-from cparser import Parser
+from scanner import Scanner, RegexScanner, GeneratedScanner
+from cparser import Parser, GeneratedParser
+from util.buffer import DoubleBuffer, MmapBuffer
+from util.logger import StreamLogger
 
 NO_PA1_TEST_CASE = 10
 NO_PA2_TEST_CASE = 10
@@ -17,12 +19,51 @@ class TestCases(unittest.TestCase):
         This function will open a stringIO object and pass it to log method
         in the scanner and the output will be compared.
         """
+        self.check_pa1_test_cases(Scanner)
+
+    def test_pa1_test_cases_regex(self):
+        """Test all PA1 test cases with the regex scanner"""
+        self.check_pa1_test_cases(RegexScanner)
+
+    def test_pa1_test_cases_generated(self):
+        """Test all PA1 test cases with the generated scanner module"""
+        self.check_pa1_test_cases(GeneratedScanner)
+
+    def test_pa1_test_cases_double_buffer(self):
+        """Test all PA1 test cases with small blocks of DoubleBuffer"""
+        self.check_pa1_test_cases(
+            lambda file: Scanner(buffer=DoubleBuffer(file, block_size=7)))
+
+    def test_pa1_test_cases_mmap(self):
+        """Test all PA1 test cases with MmapBuffer"""
+        self.check_pa1_test_cases(
+            lambda file: Scanner(buffer=MmapBuffer(file)))
+
+    def test_pa1_test_cases_stream(self):
+        """Test all PA1 test cases with StreamLogger"""
+        test_path = Path(__file__).parent.joinpath('./PA1_testcases')
+        for i, test in enumerate(test_path.iterdir()):
+            with self.subTest(testcase=i):
+                sym, tok, err = [StringIO() for _ in range(3)]
+                scanner = Scanner(file=str(test.joinpath('input.txt')),
+                                  logger=StreamLogger(tok, err))
+                scanner.iterate_ignore()
+                self.assertLessEqual(len(scanner.logger.tokens), 1)
+                scanner.dump_log(file_symbols=sym)
+                for created, output in [(tok, 'tokens.txt'),
+                                        (sym, 'symbol_table.txt'),
+                                        (err, 'lexical_errors.txt')]:
+                    self.assertEqual(created.getvalue(),
+                                     test.joinpath(output).read_text())
+                scanner.buf.close()
+
+    def check_pa1_test_cases(self, scanner_class):
         test_path = Path(__file__).parent.joinpath('./PA1_testcases')
         for i, test in enumerate(test_path.iterdir()):
             with self.subTest(testcase=i):
                 # create scanner
                 self.maxDiff = None
-                scanner = Scanner(file=str(test.joinpath('input.txt')))
+                scanner = scanner_class(file=str(test.joinpath('input.txt')))
                 scanner.iterate_ignore()
                 # create outputs
                 sym, tok, err = [StringIO() for _ in range(3)]
@@ -40,13 +81,20 @@ class TestCases(unittest.TestCase):
 
     def test_pa2_test_cases(self):
         """Test all PA2 test cases"""
+        self.check_pa2_test_cases(Parser)
+
+    def test_pa2_test_cases_generated(self):
+        """Test all PA2 test cases with the generated parser module"""
+        self.check_pa2_test_cases(GeneratedParser)
+
+    def check_pa2_test_cases(self, parser_class):
         test_path = Path(__file__).parent.joinpath('./PA2_testcases')
         for i, test in enumerate(test_path.iterdir()):
             with self.subTest(testcase=i):
                 # create scanner
                 scanner = Scanner(file=str(test.joinpath('input.txt')))
                 tree, err = [StringIO() for _ in range(2)]
-                parser = Parser(scanner, err, tree)
+                parser = parser_class(scanner, err, tree)
                 parser.parse()
                 outputs = [(tree, 'parse_tree.txt'),
                            (err, 'syntax_errors.txt')]
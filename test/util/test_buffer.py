@@ -1,7 +1,8 @@
 import unittest
 import os
 
-from util.buffer import AllBuffer
+from util.buffer import AllBuffer, DoubleBuffer, MmapBuffer, Span
+from util.types_ import SIGMA
 
 TESTDATA_FILENAME = os.path.join(os.path.dirname(__file__), '../input.txt')
 
@@ -35,10 +36,161 @@ class AllBufferTest(unittest.TestCase):
         self.assertEqual(self.buf(), " ")
 
     def test_extract_retreat(self):
-        pass
+        for _ in range(4):
+            self.buf.step()
+        self.assertEqual(self.buf.extract_retreat(), "void")
+        self.assertEqual(self.buf.forward, 4)
+        self.assertEqual(self.buf.beginning, 4)
+        self.assertEqual(self.buf(), " ")
 
     def test_none_when_end(self):
-        pass
+        self.buf.advance(len(self.buf.file) + 1)
+        self.assertEqual(self.buf.forward, len(self.buf.file))
+        self.assertEqual(self.buf(), "\x05")
+
+    def test_line_no(self):
+        self.assertEqual(self.buf.lineno, 1)
+        self.assertTrue(self.buf.skip_to("\n"))
+        self.assertEqual(self.buf(), "\n")
+        self.assertEqual(self.buf.lineno, 2)  # counted once stepped onto
+
+    def test_line_index(self):
+        buf = AllBuffer(fake="\nab\ncd\n\nx")
+        linenos = []
+        for _ in range(len(buf.file)):
+            linenos.append(buf.lineno)
+            buf.step()
+        self.assertEqual(linenos, [1, 1, 1, 2, 2, 2, 3, 4, 4])
+        self.assertEqual([buf.column_of(i) for i in range(9)],
+                         [1, 1, 2, 3, 1, 2, 3, 1, 1])
+        buf.forward = 4
+        buf.lineno = 10  # e.g. restarting from a checkpoint
+        self.assertEqual(buf.line_of(7), 12)
+        buf.advance(3)
+        self.assertEqual(buf.lineno, 12)
+
+
+class SkipTest(unittest.TestCase):
+    """bulk skipping should be the same in all buffers"""
+    buffers = [lambda text: AllBuffer(fake=text),
+               lambda text: DoubleBuffer(None, block_size=3, fake=text)]
+
+    def test_skip_while(self):
+        for make in self.buffers:
+            buf = make("a \n\t\n b")
+            buf.step()
+            buf.extract_retreat()
+            buf.skip_while(" \t\n")
+            self.assertEqual((buf.beginning, buf.forward), (6, 6))
+            self.assertEqual(buf.lineno, 3)
+            buf.skip_while(" ")
+            self.assertEqual(buf(), "b")
+
+    def test_step_while(self):
+        for make in self.buffers:
+            buf = make("ab12 c")
+            buf.step()
+            buf.step_while("ab12")
+            self.assertEqual((buf.beginning, buf.forward), (0, 4))
+            buf.step_while("ab")
+            self.assertEqual(buf(), " ")
+
+    def test_skip_to(self):
+        cases = [("/* a **/ b", True, 7), ("/* a * / b", False, 10),
+                 ("/* a \x05 */", False, 5), ("/*/ */", True, 5)]
+        for make in self.buffers:
+            for text, found, forward in cases:
+                with self.subTest(text=text):
+                    buf = make(text)
+                    buf.advance(2)
+                    self.assertEqual(buf.skip_to("*/"), found)
+                    self.assertEqual(buf.forward, forward)
+
+
+class DoubleBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buf = DoubleBuffer(TESTDATA_FILENAME, block_size=3)
+
+    def tearDown(self) -> None:
+        self.buf.close()
+
+    def test_call(self):
+        self.assertEqual(self.buf(), "v")
+
+    def test_step_across_blocks(self):
+        for _ in range(4):
+            self.buf.step()
+        self.assertEqual(self.buf(), " ")
+        self.assertEqual(self.buf.forward, 4)
+
+    def test_extract_across_blocks(self):
+        for _ in range(3):
+            self.buf.step()
+        self.assertEqual(self.buf.extract(), "void")
+        self.assertEqual(self.buf.forward, 4)
+        self.assertEqual(self.buf.beginning, 4)
+        self.assertEqual(self.buf(), " ")
+
+    def test_long_lexim(self):
+        buf = DoubleBuffer(fake="/* long\ncomment */ x", block_size=2)
+        for _ in range(17):
+            buf.step()
+        self.assertEqual(buf.lineno, 2)
+        self.assertEqual(buf.extract(), "/* long\ncomment */")
+        self.assertEqual(buf(), " ")
+
+    def test_extract_retreat(self):
+        buf = DoubleBuffer(fake="abc;", block_size=2)
+        for _ in range(3):
+            buf.step()
+        self.assertEqual(buf.extract_retreat(), "abc")
+        self.assertEqual(buf(), ";")
+
+    def test_none_when_end(self):
+        buf = DoubleBuffer(fake="ab", block_size=2)
+        for _ in range(3):
+            buf.step()
+        self.assertEqual(buf(), "\x05")
+        self.assertEqual(buf.forward, 2)
+        self.assertEqual(buf.extract(), "ab")
+
+
+class MmapBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buf = MmapBuffer(TESTDATA_FILENAME)
+
+    def tearDown(self) -> None:
+        self.buf.close()
+
+    def test_call(self):
+        self.assertEqual(self.buf(), "v")
+
+    def test_extract(self):
+        for _ in range(3):
+            self.buf.step()
+        span = self.buf.extract()
+        self.assertIsInstance(span, Span)
+        self.assertEqual((span.offset, len(span)), (0, 4))
+        self.assertEqual(str(span), "void")
+        self.assertEqual(self.buf(), " ")
+
+    def test_extract_retreat(self):
+        buf = MmapBuffer(fake="abc;")
+        for _ in range(3):
+            buf.step()
+        self.assertEqual(str(buf.extract_retreat()), "abc")
+        self.assertEqual(buf(), ";")
+
+    def test_multibyte(self):
+        buf = MmapBuffer(fake="aé;")
+        buf.step()
+        self.assertNotIn(buf(), SIGMA)
+        self.assertEqual(str(buf.extract()), "aé")
+        self.assertEqual(buf(), ";")
 
     def test_line_no(self):
-        pass
+        buf = MmapBuffer(fake="a\r\nb\rc\nd")
+        for expected in [2, 2, 2, 3, 3, 4, 4]:
+            buf.step()
+            self.assertEqual(buf.lineno, expected)
+        self.assertEqual(str(buf.extract()), "a\nb\nc\nd")
@@ -0,0 +1,27 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from util import scangen
+
+
+class ScangenTest(unittest.TestCase):
+    def test_rebuild_when_stale(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, 'cminus_scanner.py')
+            self.assertTrue(scangen.is_stale(path))
+            scangen.load(path)
+            self.assertFalse(scangen.is_stale(path))
+            source = path.read_text()
+            # e.g. the language definition changed
+            path.write_text(source.replace(scangen.fingerprint(), "0" * 64))
+            self.assertTrue(scangen.is_stale(path))
+            module = scangen.load(path)
+            self.assertEqual(path.read_text(), source)
+            self.assertTrue(callable(module.match))
+
+    def test_read_only(self):
+        path = Path(tempfile.gettempdir(), 'missing', 'cminus_scanner.py')
+        module = scangen.load(path)
+        self.assertFalse(path.exists())
+        self.assertTrue(callable(module.match_text))
@@ -0,0 +1,63 @@
+import unittest
+from io import StringIO
+
+from anytree import RenderTree
+
+from util.tree import ParseTree
+
+
+class ParseTreeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tree = ParseTree()
+        a, b, c = [self.tree.intern(label) for label in "abc"]
+        root = self.tree.add(a)
+        first = self.tree.add(b, root)
+        self.tree.add(c, first)
+        self.tree.add(c, first)
+        second = self.tree.add(b, root)
+        self.tree.add_epsilon(second)
+        self.root, self.first, self.second = root, first, second
+
+    def test_interned_labels(self):
+        self.assertEqual(self.tree.labels, ["epsilon", "a", "b", "c"])
+        self.assertEqual(self.tree.intern("b"), 2)
+
+    def test_children(self):
+        self.assertEqual(self.tree.children(self.root),
+                         [self.first, self.second])
+        self.assertEqual(self.tree.children(self.second), [ParseTree.EPSILON])
+        self.assertEqual(self.tree.parent[self.second], self.root)
+
+    def test_render(self):
+        self.assertEqual(list(self.tree.render()), [
+            "a", "├── b", "│   ├── c", "│   └── c", "└── b",
+            "    └── epsilon"])
+
+    def test_to_anytree(self):
+        root = self.tree.to_anytree()
+        lines = [f"{pre}{node.name}" for pre, _, node in RenderTree(root)]
+        self.assertEqual(lines, list(self.tree.render()))
+
+    def test_empty(self):
+        self.assertEqual(list(ParseTree().render()), [])
+        self.assertIsNone(ParseTree().to_anytree())
+
+    def test_write(self):
+        for chunk_lines in [1, 2, 5, 6, 100]:
+            with self.subTest(chunk_lines=chunk_lines):
+                file = StringIO()
+                self.tree.write(file, chunk_lines)
+                self.assertEqual(file.getvalue(),
+                                 "\n".join(self.tree.render()))
+
+    def test_graft(self):
+        for like in [self.tree, None]:
+            with self.subTest(shared=like is not None):
+                tree = ParseTree(like)
+                root = tree.add(tree.intern("x"))
+                tree.graft(self.tree, root)
+                tree.graft(self.tree, root)
+                lines = list(self.tree.render())
+                sub = ["├── " + lines[0]] + ["│   " + l for l in lines[1:]]
+                sub += ["└── " + lines[0]] + ["    " + l for l in lines[1:]]
+                self.assertEqual(list(tree.render()), ["x"] + sub)
@@ -0,0 +1,79 @@
+import unittest
+
+from scanner import Scanner
+from util.buffer import AllBuffer
+from util.types_ import KEYWORDS, Interner, SymbolTable, TokenType
+
+
+class InternerTest(unittest.TestCase):
+    def test_keywords(self):
+        interner = Interner()
+        for i, keyword in enumerate(KEYWORDS):
+            self.assertEqual(interner.id(keyword), i)
+            self.assertTrue(interner.is_keyword(interner.intern(keyword)))
+        self.assertFalse(interner.is_keyword(interner.intern("main")))
+
+    def test_intern(self):
+        interner = Interner()
+        a = interner.intern("abc")
+        self.assertIs(interner.intern("ab" + "c"), a)
+        self.assertEqual(a, "abc")
+        self.assertEqual(interner.id(a), len(KEYWORDS))
+        self.assertEqual(interner.id("x"), len(KEYWORDS) + 1)
+        self.assertEqual(len(interner), len(KEYWORDS) + 2)
+
+
+class SymbolTableTest(unittest.TestCase):
+    def test_classify(self):
+        table = SymbolTable(Interner())
+        self.assertEqual(table.classify("while")[0], TokenType.ID)
+        self.assertEqual(table.classify("if")[0], TokenType.KEYWORD)
+        self.assertEqual(list(table.table), sorted(KEYWORDS) + ["while"])
+
+    def test_shared_interner(self):
+        interner = Interner()
+        a, b = SymbolTable(interner), SymbolTable(interner)
+        self.assertIs(a.install("shared"), b.install("shared"))
+        self.assertNotIn("shared", SymbolTable(interner).table)
+        # there is no process-wide interner
+        self.assertIsNot(SymbolTable().interner, SymbolTable().interner)
+
+    def test_scopes(self):
+        interner = Interner()
+        table = SymbolTable(interner)
+        x, y = table.install("x"), table.install("y")
+        table.declare(x, "global x")
+        table.push_scope()
+        table.declare(x, "local x")
+        table.declare(y, "local y")
+        with self.assertRaises(KeyError):
+            table.declare(y, "local y")
+        self.assertEqual(table.lookup(x), "local x")
+        self.assertEqual(table.pop_scope(), {interner.id(x): "local x",
+                                             interner.id(y): "local y"})
+        self.assertEqual(table.lookup(x), "global x")
+        with self.assertRaises(KeyError):
+            table.lookup(y)
+
+    def test_unknown_symbol(self):
+        interner = Interner()
+        table = SymbolTable(interner)
+        size = len(interner)
+        with self.assertRaises(KeyError):
+            table.lookup("unknown")
+        with self.assertRaises(KeyError):
+            table.declare("unknown")
+        self.assertFalse(interner.is_keyword("unknown"))
+        self.assertEqual(len(interner), size)
+        with self.assertRaises(IndexError):
+            table.pop_scope()
+
+    def test_tokens_carry_symbols(self):
+        interner = Interner()
+        scanner = Scanner(AllBuffer(fake="int abc; abc"), interner=interner)
+        tokens = [token for token in scanner.iterator
+                  if token[0] in (TokenType.ID, TokenType.KEYWORD)]
+        for tt, lexim, _ in tokens:
+            self.assertIs(lexim, interner.intern(lexim))
+        self.assertEqual(interner.id(tokens[0][1]), KEYWORDS.index("int"))
+        self.assertIs(tokens[1][1], tokens[2][1])